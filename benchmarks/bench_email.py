@@ -0,0 +1,167 @@
+"""Measure email throughput and latency against the in-process SMTP sink.
+
+Scenarios:
+  connect-per-message  the old send path: connect, login, send, quit for every email
+  pooled               send_real_email() one after another over the connection pool
+  bulk                 send_bulk() to --count recipients from several threads
+  attachment           send_real_email() with a --attachment-mb file, streamed
+
+The sink adds --latency-ms before every reply and --login-ms to the greeting
+and AUTH, standing in for the network and TLS/login cost of a real server.
+Results can be saved with --json; with --baseline the run exits non-zero if
+any scenario's messages/s fell more than --tolerance below the saved run.
+
+Usage: python benchmarks/bench_email.py [--count 200] [--attachment-mb 20] [--json out.json] [--baseline old.json]
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from common import find_regressions, percentile
+
+os.environ['EMAIL_SMTP_SERVER'] = 'local'
+import email_sender  # noqa: E402
+from smtp_sink import LocalSMTP, SMTPSink, use_sink  # noqa: E402
+
+
+def send_connect_per_message(config, recipient, subject, body):
+    """The pre-pooling send path, kept here as the baseline"""
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
+    msg = MIMEMultipart()
+    msg['From'] = config.sender_email
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    server = LocalSMTP()
+    server.login(config.sender_email, config.sender_password)
+    server.sendmail(config.sender_email, recipient, msg.as_string())
+    server.quit()
+
+
+def timed_calls(func, arguments):
+    """Call func for each argument tuple; return (total seconds, per-call latencies)"""
+    latencies = []
+    start = time.perf_counter()
+    for args in arguments:
+        call_start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - call_start)
+    return time.perf_counter() - start, latencies
+
+
+def run_bulk(config, count):
+    """send_bulk() with each per-recipient send timed"""
+    latencies = []
+    send_templated = email_sender.send_templated
+
+    def timed_send(*args, **kwargs):
+        call_start = time.perf_counter()
+        send_templated(*args, **kwargs)
+        latencies.append(time.perf_counter() - call_start)
+
+    email_sender.send_templated = timed_send
+    try:
+        recipients = [{"email": f"user{i}@example.com", "name": f"User {i}"} for i in range(count)]
+        start = time.perf_counter()
+        results = email_sender.send_bulk(recipients, "Tasks for $name", "Hello $name,\nyour tasks are attached.",
+                                         config=config)
+        seconds = time.perf_counter() - start
+    finally:
+        email_sender.send_templated = send_templated
+    if not all(results.values()):
+        raise RuntimeError("bulk send reported failures")
+    return seconds, latencies
+
+
+def result(name, seconds, latencies, **extra):
+    count = len(latencies)
+    return dict({
+        "scenario": name,
+        "messages": count,
+        "seconds": round(seconds, 4),
+        "messages_per_sec": round(count / seconds, 2) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }, **extra)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200, help="messages per scenario")
+    parser.add_argument("--attachment-mb", type=float, default=20)
+    parser.add_argument("--attachment-runs", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="delay before every sink reply")
+    parser.add_argument("--login-ms", type=float, default=20.0, help="extra delay for greeting and AUTH")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed drop in messages/s against --baseline (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    sink = use_sink(SMTPSink(keep=0, directory="", latency=args.latency_ms / 1000,
+                             login_delay=args.login_ms / 1000))
+    config = email_sender.EmailConfig()
+    subject, body = "Todo Tasks Report", "Please find the attached todo tasks report."
+    recipients = [(f"user{i}@example.com",) for i in range(args.count)]
+    results = []
+
+    seconds, latencies = timed_calls(lambda to: send_connect_per_message(config, to, subject, body), recipients)
+    results.append(result("connect-per-message", seconds, latencies))
+
+    email_sender.close_pools()
+    seconds, latencies = timed_calls(lambda to: email_sender.send_real_email(to, subject, body, config=config),
+                                     recipients)
+    results.append(result("pooled", seconds, latencies))
+
+    email_sender.close_pools()
+    results.append(result("bulk", *run_bulk(config, args.count)))
+
+    # Last, so its peak memory growth is not hidden by earlier scenarios
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "report.pdf")
+        size = int(args.attachment_mb * 2 ** 20)
+        with open(path, 'wb') as f:
+            f.write(os.urandom(size))
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        seconds, latencies = timed_calls(
+            lambda: email_sender.send_real_email("client@example.com", subject, body, [path], config),
+            [()] * args.attachment_runs)
+        grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024
+        results.append(result("attachment", seconds, latencies,
+                              mb_per_sec=round(args.attachment_mb * args.attachment_runs / seconds, 1),
+                              rss_growth_mb=round(grown, 1)))
+    email_sender.close_pools()
+
+    print(f"{'scenario':>20} {'msgs':>6} {'seconds':>8} {'msgs/s':>9} {'p50 ms':>8} {'p99 ms':>8}  extra")
+    for row in results:
+        extra = f"{row['mb_per_sec']} MB/s, +{row['rss_growth_mb']} MB RSS" if "mb_per_sec" in row else ""
+        print(f"{row['scenario']:>20} {row['messages']:>6} {row['seconds']:>8.2f} {row['messages_per_sec']:>9.1f} "
+              f"{row['p50_ms']:>8.1f} {row['p99_ms']:>8.1f}  {extra}")
+    print(f"sink: {sink.connections} connections, {sink.message_count} messages, "
+          f"{sink.bytes_received / 2 ** 20:.1f} MB received")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"created": time.time(), "args": vars(args), "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        settings = ("count", "attachment_mb", "attachment_runs", "latency_ms", "login_ms")
+        if any(saved["args"].get(name) != getattr(args, name) for name in settings):
+            print("note: the baseline was run with different settings (" + ", ".join(settings) + ")")
+        failures = find_regressions(results, saved["results"], ["scenario"], "messages_per_sec", args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
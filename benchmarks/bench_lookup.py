@@ -0,0 +1,54 @@
+"""Show that id lookups, updates, toggles and deletes stay flat as the list grows.
+
+Usage: python benchmarks/bench_lookup.py [--sizes 1000,10000,100000,1000000]
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from common import time_per_op, write_store
+from storage import JsonFileStorage
+from todo_manager import TodoManager
+
+OPS_PER_SIZE = 2000
+
+
+def bench_size(count, workdir):
+    data_file = write_store(os.path.join(workdir, f"todos_{count}.json"), count)
+    # Journal mode keeps persistence O(1) per change, so the numbers below
+    # reflect the in-memory index rather than rewriting the whole file.
+    storage = JsonFileStorage(
+        data_file,
+        journal=True,
+        journal_max_records=10 ** 9,
+        journal_max_bytes=10 ** 12
+    )
+    manager = TodoManager(data_file=data_file, storage=storage)
+
+    rng = random.Random(count)
+    ids = [(rng.randint(1, count),) for _ in range(OPS_PER_SIZE)]
+    results = {
+        "find": time_per_op(manager.find_todo_by_id, ids),
+        "update": time_per_op(lambda i: manager.update_todo(i, new_title="Renamed"), ids),
+        "toggle": time_per_op(manager.toggle_complete, ids),
+        "delete": time_per_op(manager.delete_todo, [(i,) for i in rng.sample(range(1, count + 1), min(OPS_PER_SIZE, count))]),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    print(f"{'todos':>10} {'find ns':>10} {'update ns':>10} {'toggle ns':>10} {'delete ns':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in sizes:
+            r = bench_size(count, workdir)
+            print(f"{count:>10} {r['find']:>10.0f} {r['update']:>10.0f} {r['toggle']:>10.0f} {r['delete']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare the memory used to hold N todos in each in-memory representation.
+
+Usage: python benchmarks/bench_memory.py [--count 100000]
+"""
+import argparse
+import tracemalloc
+
+import common  # noqa: F401 - puts src/ on sys.path
+from columnar_store import ColumnarTodoStore
+from todo import Todo
+
+
+class DictTodo:
+    """The pre-__slots__ Todo layout, kept here as the baseline"""
+
+    def __init__(self, data):
+        self.id = data["id"]
+        self.title = data["title"]
+        self.description = data["description"]
+        self.completed = data["completed"]
+
+
+def build_dict_todos(records):
+    return {item["id"]: DictTodo(item) for item in records}
+
+
+def build_slotted_todos(records):
+    return {item["id"]: Todo.from_dict(item) for item in records}
+
+
+def build_columnar(records):
+    store = ColumnarTodoStore()
+    for item in records:
+        store[item["id"]] = Todo.from_dict(item)
+    return store
+
+
+def iter_records(count):
+    """Yield fresh records one at a time, the way the streaming loader does.
+
+    Strings are created inside the measured region so every representation
+    pays for the text it keeps alive. Titles repeat the way real lists do,
+    which gives the columnar string table something to share.
+    """
+    for i in range(1, count + 1):
+        yield {
+            "id": i,
+            "title": f"Task group {i % 100}",
+            "description": f"Synthetic description for task {i}",
+            "completed": i % 3 == 0
+        }
+
+
+def measure(builder, count):
+    """Return the bytes still allocated by the structure builder() returns"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        store = builder(iter_records(count))
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del store
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'representation':<16} {'MB':>8} {'bytes/todo':>11} {'vs dict':>8}")
+    for name, builder in (("__dict__ Todo", build_dict_todos),
+                          ("__slots__ Todo", build_slotted_todos),
+                          ("columnar", build_columnar)):
+        used = measure(builder, args.count)
+        baseline = baseline or used
+        print(f"{name:<16} {used / 2 ** 20:>8.1f} {used / args.count:>11.0f} {used / baseline:>7.0%}")
+
+    # The optimizations are only worth keeping while they actually save memory
+    if not measure(build_columnar, args.count) < measure(build_slotted_todos, args.count) < baseline:
+        raise SystemExit("memory regression: expected columnar < slotted < __dict__")
+
+
+if __name__ == "__main__":
+    main()
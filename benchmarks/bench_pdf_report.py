@@ -0,0 +1,85 @@
+"""Time the PDF report for large task lists, against the old single-table layout.
+
+The baseline is the previous writer: one Table holding every task, with a
+setStyle() call per completed row. It is skipped above --baseline-max tasks
+because it grows much faster than linearly.
+
+Usage: python benchmarks/bench_pdf_report.py [--sizes 10000,100000] [--baseline-max 10000]
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+
+from common import make_records
+from reports import write_pdf_report
+from todo import Todo
+
+
+def write_single_table_pdf(tasks, path):
+    """The pre-chunking task table, kept here as the baseline"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table as RLTable, TableStyle
+
+    task_data = [['ID', 'Title', 'Description', 'Status']]
+    for task in tasks:
+        status = "Complete" if task.completed else "Incomplete"
+        task_data.append([str(task.id), task.title, task.description, status])
+
+    task_table_pdf = RLTable(task_data)
+    task_table_pdf.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('TEXTCOLOR', (3, 1), (3, -1), colors.red),
+    ]))
+    for i, task in enumerate(tasks, start=1):
+        if task.completed:
+            task_table_pdf.setStyle(TableStyle([('TEXTCOLOR', (3, i), (3, i), colors.green)]))
+
+    SimpleDocTemplate(path, pagesize=letter).build([task_table_pdf])
+
+
+def measure(writer, tasks, path):
+    """Return (seconds, peak RSS growth in MB) for one report"""
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    writer(tasks, path)
+    seconds = time.perf_counter() - start
+    grown = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024
+    return seconds, grown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--baseline-max", type=int, default=10000)
+    args = parser.parse_args()
+
+    # Run the smallest size first: peak RSS only ever grows, so later
+    # (bigger) runs report their growth over the earlier ones
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    print(f"{'todos':>10} {'layout':>14} {'seconds':>8} {'rows/s':>9} {'+RSS MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in sizes:
+            tasks = [Todo.from_dict(item) for item in make_records(count)]
+            runs = [("chunked", write_pdf_report)]
+            if count <= args.baseline_max:
+                runs.append(("single table", write_single_table_pdf))
+            for name, writer in runs:
+                path = os.path.join(workdir, f"{name.replace(' ', '_')}_{count}.pdf")
+                seconds, grown = measure(writer, tasks, path)
+                size = os.path.getsize(path) / 2 ** 20
+                print(f"{count:>10} {name:>14} {seconds:>8.2f} {count / seconds:>9,.0f} {grown:>8.1f} {size:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Compare startup time of the JSON and binary (mmap) snapshot formats.
+
+Usage: python benchmarks/bench_snapshot_load.py [--sizes 100000,1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import write_store
+from binary_snapshot import BinarySnapshotStorage, json_to_binary
+from storage import JsonFileStorage
+from todo_manager import TodoManager
+
+
+def time_startup(data_file, storage):
+    """Return (load seconds, first lookup seconds, full scan seconds)"""
+    start = time.perf_counter()
+    manager = TodoManager(data_file=data_file, storage=storage)
+    loaded = time.perf_counter()
+    manager.find_todo_by_id(manager.count() // 2)
+    looked_up = time.perf_counter()
+    sum(1 for todo in manager.get_all_todos() if todo.completed)
+    scanned = time.perf_counter()
+    manager.close()
+    return loaded - start, looked_up - loaded, scanned - looked_up
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'todos':>10} {'format':>7} {'size MB':>8} {'load s':>8} {'lookup ms':>10} {'scan s':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in (int(size) for size in args.sizes.split(",")):
+            json_file = write_store(os.path.join(workdir, f"todos_{count}.json"), count)
+            binary_file = os.path.join(workdir, f"todos_{count}.bin")
+            json_to_binary(json_file, binary_file)
+
+            for name, path, storage in (("json", json_file, JsonFileStorage(json_file)),
+                                        ("binary", binary_file, BinarySnapshotStorage(binary_file))):
+                load, lookup, scan = time_startup(json_file, storage)
+                size = os.path.getsize(path) / 2 ** 20
+                print(f"{count:>10} {name:>7} {size:>8.1f} {load:>8.3f} {lookup * 1000:>10.3f} {scan:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Benchmark TodoManager operations, persistence and report exports at 1k to 1M tasks.
+
+For every store size and storage backend a fresh child process builds a
+synthetic store and times:
+
+  load           TodoManager(...) on the store (reads every task)
+  find           find_todo_by_id on random ids
+  add            add_todo
+  toggle         toggle_complete on random ids
+  delete         delete_todo on distinct random ids
+  save           save_to_file (full rewrite)
+  report_txt     the TXT/PDF/XLSX paths TodoApp takes for Print Final Record
+  report_pdf     and Export to Excel (reports.build_reports, rendered in
+  report_xlsx    process, no cache hit); only up to --report-max tasks
+
+Each operation is sampled up to --samples times or until --op-seconds have
+passed (at least --min-samples times), so slow full-file writes at 1M tasks
+finish in reasonable time. Rows report throughput, p50/p99 latency and the
+child's peak RSS once the operation finished (peak RSS only grows, so it is
+the high-water mark up to that point). For reports, ops/s counts task rows
+written per second. Results can be saved with --json and
+compared with an earlier run with --baseline (exits non-zero if any ops/s
+fell more than --tolerance).
+
+Usage: python benchmarks/bench_suite.py [--sizes 1000,100000,1000000] [--storage json,journal]
+                                        [--json results.json] [--baseline earlier.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import SRC_DIR, find_regressions, make_records, percentile
+
+REPORT_FORMATS = ("txt", "pdf", "xlsx")
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def sample(func, args_iter, samples, min_samples, op_seconds):
+    """Time func over arguments until samples are taken or the time is up"""
+    latencies = []
+    started = time.perf_counter()
+    for args in args_iter:
+        if len(latencies) >= samples:
+            break
+        if len(latencies) >= min_samples and time.perf_counter() - started > op_seconds:
+            break
+        call_start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - call_start)
+    return latencies
+
+
+def row(size, storage, op, latencies, per_call=1):
+    """One result row; per_call is the number of items one call handles (rows for reports)"""
+    seconds = sum(latencies)
+    return {
+        "size": size,
+        "storage": storage,
+        "op": op,
+        "samples": len(latencies),
+        "ops_per_sec": round(len(latencies) * per_call / seconds, 1) if seconds else 0.0,
+        "p50_us": round(percentile(latencies, 50) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 99) * 1e6, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_child(size, storage, args):
+    """Benchmark one store in this process and return the result rows"""
+    from storage import create_storage
+    from todo import Todo
+    from todo_manager import TodoManager
+    import reports
+
+    limits = (args.samples, args.min_samples, args.op_seconds)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        data_file = os.path.join(workdir, "todos.json")
+        # Written straight through the backend, so building the store is not timed
+        seed = create_storage(data_file, storage, durability="always")
+        seed.save_all([Todo.from_dict(item) for item in make_records(size)])
+        seed.close()
+        del seed
+
+        managers = []
+
+        def load():
+            if managers:
+                managers.pop().close()
+            managers.append(TodoManager(data_file=data_file, storage=storage))
+
+        results.append(row(size, storage, "load", sample(load, iter(lambda: (), None), args.load_runs, 1,
+                                                         args.op_seconds)))
+        manager = managers[0]
+
+        rng = random.Random(size)
+        random_ids = iter(lambda: (rng.randint(1, size),), None)
+        results.append(row(size, storage, "find", sample(manager.find_todo_by_id, random_ids, *limits)))
+        results.append(row(size, storage, "add", sample(
+            manager.add_todo, ((f"Bench task {i}", "added by bench_suite") for i in range(10 ** 9)), *limits)))
+        results.append(row(size, storage, "toggle", sample(manager.toggle_complete, random_ids, *limits)))
+        doomed = ((todo_id,) for todo_id in rng.sample(range(1, size + 1), min(size, args.samples)))
+        results.append(row(size, storage, "delete", sample(manager.delete_todo, doomed, *limits)))
+        results.append(row(size, storage, "save", sample(manager.save_to_file, iter(lambda: (), None),
+                                                         args.save_runs, 1, args.op_seconds)))
+
+        if size <= args.report_max:
+            tasks = manager.get_all_todos()
+            for fmt in REPORT_FORMATS:
+                report_dir = os.path.join(workdir, f"reports_{fmt}")
+                latencies = sample(
+                    lambda: reports.build_reports(tasks, [fmt], directory=report_dir, parallel=False),
+                    iter(lambda: (), None), args.report_runs, 1, args.op_seconds)
+                results.append(row(size, storage, f"report_{fmt}", latencies, per_call=len(tasks)))
+        manager.close()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,1000000")
+    parser.add_argument("--storage", default="json", help="comma-separated backends: json, journal, sqlite, binary")
+    parser.add_argument("--samples", type=int, default=2000, help="most calls timed per operation")
+    parser.add_argument("--min-samples", type=int, default=5)
+    parser.add_argument("--op-seconds", type=float, default=10.0, help="stop sampling an operation after this long")
+    parser.add_argument("--load-runs", type=int, default=3)
+    parser.add_argument("--save-runs", type=int, default=5)
+    parser.add_argument("--report-runs", type=int, default=1)
+    parser.add_argument("--report-max", type=int, default=100000, help="largest store to time reports on")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed drop in ops/s against --baseline (default 0.2 = 20%%)")
+    parser.add_argument("--child", nargs=2, metavar=("SIZE", "STORAGE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # One store per process, so peak RSS belongs to this store alone
+        print(json.dumps(run_child(int(args.child[0]), args.child[1], args)))
+        return
+
+    results = []
+    print(f"{'todos':>9} {'storage':>8} {'op':>12} {'samples':>8} {'ops/s':>12} "
+          f"{'p50 us':>10} {'p99 us':>11} {'peak MB':>8}")
+    for size in (int(size) for size in args.sizes.split(",")):
+        for storage in args.storage.split(","):
+            command = [sys.executable, os.path.abspath(__file__), "--child", str(size), storage]
+            command += [arg for arg in sys.argv[1:] if arg not in ("--child",)]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            for r in json.loads(output.strip().splitlines()[-1]):
+                results.append(r)
+                print(f"{r['size']:>9} {r['storage']:>8} {r['op']:>12} {r['samples']:>8} {r['ops_per_sec']:>12,.1f} "
+                      f"{r['p50_us']:>10,.1f} {r['p99_us']:>11,.1f} {r['peak_rss_mb']:>8.1f}")
+
+    if args.json:
+        meta = {
+            "created": time.time(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {name: value for name, value in vars(args).items() if name != "child"},
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        failures = find_regressions(results, saved["results"], ["size", "storage", "op"], "ops_per_sec",
+                                    args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
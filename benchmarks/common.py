@@ -0,0 +1,60 @@
+"""Shared helpers for the benchmark scripts in this directory"""
+import json
+import os
+import sys
+import time
+
+# The application modules live in /src and import each other by bare name
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def make_records(count, completed_every=3):
+    """Build synthetic todo records shaped like the ones in todos.json"""
+    return [
+        {
+            "id": i,
+            "title": f"Task {i}",
+            "description": f"Synthetic description for task {i}",
+            "completed": i % completed_every == 0
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def write_store(path, count):
+    """Write a synthetic todos.json with the given number of tasks"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(make_records(count), f)
+    return path
+
+
+def time_per_op(func, args_list):
+    """Call func once per argument and return the mean cost in nanoseconds"""
+    start = time.perf_counter_ns()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter_ns() - start) / max(len(args_list), 1)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile (pct in 0-100) of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def find_regressions(results, baseline, key_fields, metric, tolerance):
+    """Compare result rows with a baseline run's rows (matched on key_fields)
+    and describe every row whose metric fell more than tolerance below it"""
+    saved = {tuple(row[field] for field in key_fields): row for row in baseline}
+    failures = []
+    for row in results:
+        old = saved.get(tuple(row[field] for field in key_fields))
+        if old and row[metric] < old[metric] * (1 - tolerance):
+            name = " ".join(str(row[field]) for field in key_fields)
+            failures.append(f"{name}: {row[metric]:,.1f} {metric}, was {old[metric]:,.1f}")
+    return failures
@@ -0,0 +1,115 @@
+"""Check that the CLI starts within a time budget and imports nothing heavy up front.
+
+Each run starts a fresh interpreter that imports app before anything else,
+then runs the real TodoApp() and TodoApp.run() with stdin closed, so it
+renders the welcome panel and the menu and stops at the first prompt. It
+runs from a copy of src in a temporary directory, so the todo list and
+outbox start empty and the real ones are not touched. The script reports
+the median wall-clock time and the cumulative `python -X importtime` figure
+for app, and exits non-zero if either is over budget, if the menu was not
+reached, or if a module that should load lazily (reportlab, openpyxl,
+smtplib, dotenv, ...) was imported.
+
+Usage: python benchmarks/startup_budget.py [--runs 7] [--budget-ms 400] [--import-budget-ms 150]
+"""
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import SRC_DIR
+
+# Modules that only specific actions need
+LAZY_MODULES = (
+    "reportlab", "openpyxl", "smtplib", "dotenv", "email.mime",
+    "sqlite3", "rich.progress", "rich.layout", "email_sender",
+)
+
+FIRST_SCREEN = """
+import app
+import sys
+try:
+    # stdin is closed, so the first menu prompt ends the run
+    app.TodoApp().run()
+except EOFError:
+    pass
+lazy = sys.argv[1].split(",")
+print("\\nLAZY:" + ",".join(name for name in sys.modules if any(name == m or name.startswith(m + ".") for m in lazy)))
+"""
+
+
+def run_once(src, env, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", FIRST_SCREEN, ",".join(LAZY_MODULES)]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=src, env=env, stdin=subprocess.DEVNULL, capture_output=True,
+                            text=True, check=True)
+    elapsed = time.perf_counter() - start
+    if "Enter your choice" not in result.stdout:
+        raise RuntimeError(f"the menu prompt was never reached:\n{result.stdout[-2000:]}{result.stderr[-2000:]}")
+    return elapsed, result
+
+
+def lazy_loaded(stdout):
+    """Lazily loaded modules the run imported anyway"""
+    line = next(line for line in stdout.splitlines() if line.startswith("LAZY:"))
+    return [name for name in line[len("LAZY:"):].split(",") if name]
+
+
+def app_import_ms(stderr):
+    """Cumulative import time of the app module from -X importtime output"""
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s*\d+ \|\s*(\d+) \| app$", line)
+        if match:
+            return int(match.group(1)) / 1000
+    raise RuntimeError("app not found in -X importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=400.0,
+                        help="maximum median wall-clock time to the first screen")
+    parser.add_argument("--import-budget-ms", type=float, default=150.0,
+                        help="maximum cumulative import time of app")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "src")
+        shutil.copytree(SRC_DIR, src, ignore=shutil.ignore_patterns(
+            "__pycache__", "todos.*", "*.lock", "*.users", "reports", "outbox", "final_record_*", "todo_tasks_*"))
+        env = dict(os.environ, TODO_OUTBOX_DIR=os.path.join(tmp, "outbox"), TODO_REPORT_DIR=os.path.join(tmp, "reports"))
+        # Warm the bytecode cache so the first run is not an outlier
+        run_once(src, env)
+        wall_ms = statistics.median(run_once(src, env)[0] * 1000 for _ in range(args.runs))
+        _, result = run_once(src, env, importtime=True)
+
+    import_ms = app_import_ms(result.stderr)
+    loaded = lazy_loaded(result.stdout)
+
+    print(f"first screen: {wall_ms:7.1f} ms median of {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print(f"import app:   {import_ms:7.1f} ms cumulative (budget {args.import_budget_ms:.0f} ms)")
+
+    failures = []
+    if wall_ms > args.budget_ms:
+        failures.append(f"startup took {wall_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if import_ms > args.import_budget_ms:
+        failures.append(f"importing app took {import_ms:.1f} ms, over the {args.import_budget_ms:.0f} ms budget")
+    if loaded:
+        failures.append("imported at startup but should load lazily: " + ", ".join(sorted(loaded)))
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Hammer one TodoManager from a thread pool and check nothing was lost.
+
+Each worker adds its own todos, toggles some of them a known number of times
+and deletes others. Afterwards the ids must be unique and the in-memory and
+reloaded state must match what the workers did. Exits non-zero on failure.
+
+Usage: python benchmarks/stress_concurrency.py [--threads 16] [--tasks-per-thread 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common  # noqa: F401 - puts src/ on sys.path
+from storage import create_storage
+from todo_manager import TodoManager
+
+CONFIGS = (
+    # (label, backend, durability, columnar, id_block_size)
+    ("journal", "journal", "always", False, 1),
+    ("journal+blocks", "journal", "always", False, 64),
+    ("journal+debounce", "journal", "debounce", False, 1),
+    ("sqlite", "sqlite", "always", False, 1),
+    ("columnar", "journal", "always", True, 1),
+)
+
+
+def worker(manager, worker_id, tasks):
+    """Run one worker's operations and return what it expects to survive"""
+    expected = {}
+    for i in range(tasks):
+        todo = manager.add_todo(f"w{worker_id}-{i}", "stress")
+        expected[todo.id] = (todo.title, False)
+        if i % 3 == 0:
+            # Toggle three times: ends up completed
+            for _ in range(3):
+                manager.toggle_complete(todo.id)
+            expected[todo.id] = (todo.title, True)
+        elif i % 5 == 0:
+            manager.delete_todo(todo.id)
+            del expected[todo.id]
+    return expected
+
+
+def run(label, backend, durability, columnar, block_size, threads, tasks, workdir):
+    data_file = os.path.join(workdir, f"{label}.json")
+    storage = create_storage(data_file, backend, durability, flush_interval_ms=20)
+    manager = TodoManager(data_file, storage=storage, columnar=columnar, id_block_size=block_size)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda n: worker(manager, n, tasks), range(threads)))
+    elapsed = time.perf_counter() - start
+
+    expected = {}
+    for result in results:
+        overlap = expected.keys() & result.keys()
+        if overlap:
+            return f"duplicate ids handed out: {sorted(overlap)[:5]}"
+        expected.update(result)
+
+    def state(m):
+        return {todo.id: (todo.title, todo.completed) for todo in m.get_all_todos()}
+
+    if state(manager) != expected:
+        return "in-memory state does not match the operations performed"
+    manager.close()
+    reloaded = TodoManager(data_file, storage=create_storage(data_file, backend, "always"))
+    if state(reloaded) != expected:
+        return "reloaded state does not match the operations performed"
+    reloaded.close()
+
+    ops = threads * tasks * 2
+    print(f"{label:<18} {ops:>7} ops {elapsed:>7.2f}s {ops / elapsed:>9.0f} ops/s  ok")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--tasks-per-thread", type=int, default=200)
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for config in CONFIGS:
+            error = run(*config, args.threads, args.tasks_per_thread, workdir)
+            if error:
+                failures += 1
+                print(f"{config[0]:<18} FAILED: {error}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
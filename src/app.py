@@ -1,26 +1,40 @@
 from todo_manager import TodoManager
+import metrics
+# Only what the welcome screen and menu need is imported here; progress
+# spinners, report libraries (reportlab, openpyxl) and email support are
+# imported inside the actions that use them to keep startup fast.
 from rich.console import Console
 from rich.table import Table as RichTable
 from rich.prompt import Prompt, IntPrompt
-from rich.text import Text
 from rich.panel import Panel
-from rich import print
-from rich.progress import Progress, SpinnerColumn
-from rich.layout import Layout
-from rich.align import Align
-from rich.box import ROUNDED, MINIMAL, HEAVY_HEAD
-from rich.style import Style
+from rich.box import ROUNDED, HEAVY_HEAD
 from rich.rule import Rule
-from rich.columns import Columns
 import time
 
+# Rows drawn in the search results table
+SEARCH_RESULTS_SHOWN = 50
+# Shown after a report path when the tasks were unchanged and the file was reused
+REUSED_NOTE = " [dim](tasks unchanged, reused)[/dim]"
+
 class TodoApp:
     def __init__(self):
         # Initialize TodoManager with a data file in the src directory
         import os
         data_file = os.path.join(os.path.dirname(__file__), "todos.json")
+        # The storage backend (json, journal or sqlite) is chosen with TODO_STORAGE
         self.manager = TodoManager(data_file=data_file)
         self.console = Console()
+        if metrics.enabled():
+            metrics.instrument_console(self.console)
+        # Rows per page in the task viewer
+        self.page_size = max(1, int(os.getenv('TODO_PAGE_SIZE', '20')))
+        # Long-lived report process, started with the first report when
+        # TODO_REPORT_WORKER is on so later reports skip the library imports
+        self.use_report_worker = os.getenv('TODO_REPORT_WORKER', 'True').lower() == 'true'
+        self._report_worker = None
+        # Background email delivery, started when a message is queued (or
+        # at startup if earlier runs left messages in the outbox)
+        self._outbox_worker = None
 
     def display_menu(self):
         """Display the main menu with enhanced rich formatting"""
@@ -37,7 +51,9 @@ class TodoApp:
             "[bold green]6.[/bold green] 📄 Print Final Record\n"
             "[bold green]7.[/bold green] 📊 Export to Excel\n"
             "[bold green]8.[/bold green] 📧 Send Email\n"
-            "[bold green]9.[/bold green] 🚪 Exit"
+            "[bold green]9.[/bold green] 🚪 Exit\n"
+            "[bold green]10.[/bold green] 🔍 Search Tasks\n"
+            "[bold green]11.[/bold green] 📬 Email Queue"
         )
 
         menu_panel = Panel(
@@ -65,9 +81,25 @@ class TodoApp:
             box=ROUNDED
         ))
 
+        stats = self.manager.load_stats
+        if stats and stats["records"]:
+            self.console.print(
+                f"[dim]Loaded {stats['records']} tasks in {stats['seconds']:.3f}s "
+                f"({stats['records_per_sec']:,.0f} records/s)[/dim]"
+            )
+
+        from outbox import Outbox
+        counts = Outbox().counts()
+        if counts["pending"] or counts["inflight"]:
+            try:
+                self._start_outbox_worker()
+                self.console.print(f"[dim]Delivering {counts['pending'] + counts['inflight']} queued email(s) in the background[/dim]")
+            except ValueError as e:
+                self.console.print(f"[red]Error starting email delivery: {e}[/red]")
+
         while True:
             self.display_menu()
-            choice = Prompt.ask("Enter your choice", choices=["1", "2", "3", "4", "5", "6", "7", "8", "9"])
+            choice = Prompt.ask("Enter your choice", choices=["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11"])
 
             if choice == '1':
                 self.add_task()
@@ -95,7 +127,17 @@ class TodoApp:
                     box=ROUNDED
                 )
                 self.console.print(exit_panel)
+                if self._report_worker:
+                    self._report_worker.close()
+                if self._outbox_worker:
+                    # Unsent messages stay queued on disk for the next run
+                    self._outbox_worker.stop()
+                self.manager.close()
                 break
+            elif choice == '10':
+                self.search_tasks()
+            elif choice == '11':
+                self.email_queue()
             else:
                 self.console.print(Panel(
                     "[red]❌ Invalid choice. Please try again.[/red]",
@@ -105,6 +147,7 @@ class TodoApp:
 
     def add_task(self):
         """Add a new task with enhanced rich input prompts"""
+        from rich.progress import Progress, SpinnerColumn
         # Enhanced input prompts with icons
         self.console.print(Panel(
             "[bold blue]📝 ADDING NEW TASK[/bold blue]",
@@ -149,10 +192,15 @@ class TodoApp:
             box=ROUNDED
         ))
 
-    def view_tasks(self):
-        """Display all tasks in an enhanced rich table format"""
-        tasks = self.manager.get_all_todos()
-        if not tasks:
+    def view_tasks(self, selecting=False):
+        """Browse tasks a page at a time in an enhanced rich table format.
+
+        Only the visible page is fetched and rendered, so showing the list
+        costs the same for ten tasks or a million. With selecting=True the
+        prompt tells the user to quit the viewer to pick a task.
+        """
+        total = self.manager.count()
+        if not total:
             self.console.print(Panel(
                 "[yellow]📋 No tasks available.[/yellow]",
                 border_style="bright_yellow",
@@ -160,12 +208,43 @@ class TodoApp:
             ))
             return
 
-        # Count completed and incomplete tasks
-        completed_count = sum(1 for task in tasks if task.completed)
-        total_count = len(tasks)
+        page_size = self.page_size
+        page = 0
+        # None shows every task, True/False only completed/pending ones
+        completed = None
+        matching = total
+        while True:
+            pages = max(1, -(-matching // page_size))
+            page = min(page, pages - 1)
+            tasks = self.manager.get_page(page * page_size, page_size, completed)
+            self._render_page(tasks, page, pages, total, matching, completed)
+
+            done_label = "pick a task" if selecting else "back to menu"
+            command = Prompt.ask(
+                f"\\[n]ext, \\[p]rev, \\[j]ump, \\[f]ilter, \\[q] {done_label}",
+                choices=["n", "p", "j", "f", "q"],
+                default="q",
+                show_choices=False
+            )
+            if command == "n":
+                page = min(page + 1, pages - 1)
+            elif command == "p":
+                page = max(page - 1, 0)
+            elif command == "j":
+                page = max(IntPrompt.ask(f"Go to page (1-{pages})", default=page + 1) - 1, 0)
+            elif command == "f":
+                view = Prompt.ask("Show", choices=["all", "pending", "completed"], default="all")
+                completed = {"all": None, "pending": False, "completed": True}[view]
+                total = self.manager.count()
+                matching = self.manager.count(completed)
+                page = 0
+            else:
+                return
 
-        # Create a header panel with statistics
-        stats_text = f"[bold cyan]📊 Total: {total_count} | Completed: {completed_count} | Pending: {total_count - completed_count}[/bold cyan]"
+    def _render_page(self, tasks, page, pages, total, matching, completed):
+        """Print one page of the task viewer"""
+        view = {None: "All", False: "Pending", True: "Completed"}[completed]
+        stats_text = f"[bold cyan]📊 Total: {total} | Showing: {view} ({matching}) | Page {page + 1} of {pages}[/bold cyan]"
         self.console.print(Panel(stats_text, border_style="cyan", box=ROUNDED))
 
         # Create a more visually appealing table to display tasks
@@ -186,9 +265,52 @@ class TodoApp:
 
         self.console.print(table)
 
+    def search_tasks(self):
+        """Find tasks by words in their title or description"""
+        self.console.print(Panel(
+            "[bold blue]🔍 SEARCH TASKS[/bold blue]",
+            border_style="bright_blue",
+            box=ROUNDED
+        ))
+
+        query = Prompt.ask("Enter search words (prefixes match, e.g. 'rep' finds 'report')")
+        start = time.perf_counter()
+        matches = self.manager.search(query)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if not matches:
+            self.console.print(Panel(
+                f"[yellow]🔍 No tasks match '{query}' ({elapsed_ms:.1f} ms).[/yellow]",
+                border_style="bright_yellow",
+                box=ROUNDED
+            ))
+            return
+
+        table = RichTable(
+            title=f"🔍 Results for '{query}'",
+            show_header=True,
+            header_style="bold blue",
+            box=HEAVY_HEAD,
+            border_style="blue"
+        )
+        table.add_column("ID", style="dim", width=5)
+        table.add_column("Title", min_width=20)
+        table.add_column("Description", min_width=20)
+        table.add_column("Status", justify="center", width=15)
+
+        # Best matches first; only the top rows are drawn
+        for task in matches[:SEARCH_RESULTS_SHOWN]:
+            status_text = "[green]✅ Complete[/green]" if task.completed else "[red]❌ Incomplete[/red]"
+            table.add_row(str(task.id), task.title, task.description, status_text)
+
+        self.console.print(table)
+        shown = min(len(matches), SEARCH_RESULTS_SHOWN)
+        self.console.print(f"[dim]{len(matches)} matches in {elapsed_ms:.1f} ms (showing {shown})[/dim]")
+
     def update_task(self):
         """Update an existing task with enhanced rich interface"""
-        self.view_tasks()
+        from rich.progress import Progress, SpinnerColumn
+        self.view_tasks(selecting=True)
         try:
             todo_id = IntPrompt.ask("Enter the ID of the task to update")
             current_task = self.manager.find_todo_by_id(todo_id)
@@ -249,7 +371,8 @@ class TodoApp:
 
     def delete_task(self):
         """Delete a task with enhanced confirmation and rich feedback"""
-        self.view_tasks()
+        from rich.progress import Progress, SpinnerColumn
+        self.view_tasks(selecting=True)
         try:
             todo_id = IntPrompt.ask("Enter the ID of the task to delete")
 
@@ -277,6 +400,8 @@ class TodoApp:
             confirm = Prompt.ask(f"Are you sure you want to delete task '{task_to_delete.title}'? (y/n)", choices=["y", "n"])
 
             if confirm.lower() == 'y':
+                # Read before deleting: the task may be a view of the removed row
+                title = task_to_delete.title
                 if self.manager.delete_todo(todo_id):
                     # Show deletion with animation
                     with Progress(
@@ -288,7 +413,7 @@ class TodoApp:
                         time.sleep(0.5)
 
                     self.console.print(Panel(
-                        f"[green]✅ Task '{task_to_delete.title}' deleted successfully![/green]",
+                        f"[green]✅ Task '{title}' deleted successfully![/green]",
                         border_style="bright_green",
                         box=ROUNDED
                     ))
@@ -313,7 +438,8 @@ class TodoApp:
 
     def toggle_complete_task(self):
         """Toggle task completion status with enhanced animation"""
-        self.view_tasks()
+        from rich.progress import Progress, SpinnerColumn
+        self.view_tasks(selecting=True)
         try:
             todo_id = IntPrompt.ask("Enter the ID of the task to mark/unmark complete")
 
@@ -371,6 +497,29 @@ class TodoApp:
                 box=ROUNDED
             ))
 
+    def _start_report_worker(self):
+        """Start (or return) the report worker; None when it is turned off"""
+        if not self.use_report_worker:
+            return None
+        if self._report_worker is None:
+            from report_worker import ReportWorker
+            self._report_worker = ReportWorker()
+        return self._report_worker.start()
+
+    def _build_reports(self, tasks, formats, **kwargs):
+        """reports.build_reports(), rendered in the warm report worker if enabled"""
+        import reports
+        worker = self._start_report_worker()
+        if worker is None:
+            return reports.build_reports(tasks, formats, **kwargs)
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            return reports.build_reports(tasks, formats, worker=worker, **kwargs)
+        except BrokenProcessPool:
+            # The worker died (e.g. killed); render here and start a new one next time
+            self._report_worker.close()
+            return reports.build_reports(tasks, formats, **kwargs)
+
     def print_final_record(self):
         """Print and save the final record of tasks to a file in /src directory"""
         tasks = self.manager.get_all_todos()
@@ -407,151 +556,38 @@ class TodoApp:
 
         self.console.print(task_table)
 
-        # Save the record to a file in the /src directory
-        import os
-        from datetime import datetime
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-        # Save text file
-        txt_filename = f"final_record_{timestamp}.txt"
-        txt_filepath = os.path.join(os.path.dirname(__file__), txt_filename)
-
+        # Save the record as text, PDF and Excel. The formats are rendered in
+        # the report worker; unchanged tasks reuse the last files.
+        from rich.progress import Progress, SpinnerColumn, BarColumn, TextColumn, TimeElapsedColumn
+        formats = ["txt", "pdf", "xlsx"]
         try:
-            with open(txt_filepath, 'w', encoding='utf-8') as f:
-                f.write("Final Todo Record\n")
-                f.write("="*50 + "\n")
-                f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-
-                f.write("Summary:\n")
-                f.write(f"Total Tasks: {len(tasks)}\n")
-                f.write(f"Completed Tasks: {completed_count}\n")
-                f.write(f"Incomplete Tasks: {incomplete_count}\n\n")
-
-                f.write("Task Details:\n")
-                f.write("-" * 50 + "\n")
-                for task in tasks:
-                    status = "Complete" if task.completed else "Incomplete"
-                    f.write(f"ID: {task.id}\n")
-                    f.write(f"Title: {task.title}\n")
-                    f.write(f"Description: {task.description}\n")
-                    f.write(f"Status: {status}\n")
-                    f.write("-" * 30 + "\n")
-
-            self.console.print(f"[green]Final record saved to: {txt_filepath}[/green]")
-
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                TextColumn("{task.completed}/{task.total}"),
+                TimeElapsedColumn(),
+                console=self.console,
+                transient=True,
+            ) as progress:
+                progress_task = progress.add_task("Generating reports...", total=len(formats))
+                paths = self._build_reports(
+                    tasks, formats,
+                    on_done=lambda fmt, path, reused: progress.advance(progress_task)
+                )
         except Exception as e:
             self.console.print(f"[red]Error saving final record: {str(e)}[/red]")
+            return
 
-        # Generate PDF version
-        try:
-            from reportlab.lib.pagesizes import letter
-            from reportlab.platypus import SimpleDocTemplate, Table as RLTable, TableStyle, Paragraph, Spacer
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib import colors
-            from reportlab.lib.units import inch
-
-            pdf_filename = f"final_record_{timestamp}.pdf"
-            pdf_filepath = os.path.join(os.path.dirname(__file__), pdf_filename)
-
-            # Create PDF document
-            doc = SimpleDocTemplate(pdf_filepath, pagesize=letter)
-            elements = []
-
-            # Add title
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=18,
-                spaceAfter=30,
-                alignment=1  # Center alignment
-            )
-            title = Paragraph("Final Todo Record", title_style)
-            elements.append(title)
-
-            # Add generation date
-            date_style = ParagraphStyle(
-                'CustomDate',
-                parent=styles['Normal'],
-                fontSize=12,
-                spaceAfter=20,
-                alignment=1  # Center alignment
-            )
-            date_para = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", date_style)
-            elements.append(date_para)
-
-            # Add summary table
-            summary_data = [
-                ['Metric', 'Count'],
-                ['Total Tasks', str(len(tasks))],
-                ['Completed Tasks', str(completed_count)],
-                ['Incomplete Tasks', str(incomplete_count)]
-            ]
-
-            summary_table_pdf = RLTable(summary_data)
-            summary_table_pdf.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 14),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-
-            elements.append(summary_table_pdf)
-            elements.append(Spacer(1, 20))
-
-            # Add tasks header
-            tasks_header = Paragraph("Task Details", styles['Heading2'])
-            elements.append(tasks_header)
-            elements.append(Spacer(1, 10))
-
-            # Add tasks table
-            task_data = [['ID', 'Title', 'Description', 'Status']]
-            for task in tasks:
-                status = "Complete" if task.completed else "Incomplete"
-                task_data.append([str(task.id), task.title, task.description, status])
-
-            task_table_pdf = RLTable(task_data)
-            task_table_pdf.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                # Color the status column based on completion
-                ('TEXTCOLOR', (3, 1), (3, -1), colors.red),  # Default to red for all statuses
-            ]))
-
-            # Apply specific colors based on status
-            for i, task in enumerate(tasks, start=1):
-                if task.completed:
-                    task_table_pdf.setStyle(TableStyle([
-                        ('TEXTCOLOR', (3, i), (3, i), colors.green)
-                    ]))
-
-            elements.append(task_table_pdf)
-
-            # Build PDF
-            doc.build(elements)
-
-            self.console.print(f"[green]PDF report saved to: {pdf_filepath}[/green]")
-            self.console.print(f"[bold green]PDF ready for client email![/bold green]")
-
-        except Exception as e:
-            self.console.print(f"[red]Error generating PDF: {str(e)}[/red]")
+        for fmt, label in (("txt", "Final record"), ("pdf", "PDF report"), ("xlsx", "Excel report")):
+            path, reused = paths[fmt]
+            self.console.print(f"[green]{label} saved to: {path}[/green]{REUSED_NOTE if reused else ''}")
+        self.console.print(f"[bold green]PDF ready for client email![/bold green]")
+        return [path for path, _ in paths.values()]
 
     def export_to_excel(self):
         """Export all tasks to an Excel file"""
+        from rich.progress import Progress, SpinnerColumn
         tasks = self.manager.get_all_todos()
 
         if not tasks:
@@ -563,107 +599,7 @@ class TodoApp:
             return
 
         try:
-            import os
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-            from openpyxl.utils import get_column_letter
-            from datetime import datetime
-
-            # Create a new workbook and select the active sheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Todo Tasks"
-
-            # Define styles
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            center_alignment = Alignment(horizontal="center", vertical="center")
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-
-            # Add headers
-            headers = ["ID", "Title", "Description", "Status"]
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = center_alignment
-                cell.border = border
-
-            # Add tasks data
-            for row, task in enumerate(tasks, 2):
-                status = "Complete" if task.completed else "Incomplete"
-
-                # Add data to cells
-                ws.cell(row=row, column=1, value=task.id).border = border
-                ws.cell(row=row, column=2, value=task.title).border = border
-                ws.cell(row=row, column=3, value=task.description).border = border
-
-                # Add status with color coding
-                status_cell = ws.cell(row=row, column=4, value=status)
-                status_cell.border = border
-                if task.completed:
-                    status_cell.font = Font(color="009900")  # Green for complete
-                else:
-                    status_cell.font = Font(color="FF0000")  # Red for incomplete
-
-                # Center align the content
-                for col in range(1, 5):
-                    ws.cell(row=row, column=col).alignment = center_alignment
-
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-
-                adjusted_width = min(max_length + 2, 50)  # Limit max width to 50
-                ws.column_dimensions[column_letter].width = adjusted_width
-
-            # Add a summary sheet
-            summary_ws = wb.create_sheet(title="Summary")
-
-            # Add summary information
-            summary_ws['A1'] = "Todo Application Summary"
-            summary_ws['A1'].font = Font(size=16, bold=True)
-
-            summary_ws['A3'] = "Total Tasks:"
-            summary_ws['B3'] = len(tasks)
-
-            completed_count = sum(1 for task in tasks if task.completed)
-            summary_ws['A4'] = "Completed Tasks:"
-            summary_ws['B4'] = completed_count
-
-            incomplete_count = len(tasks) - completed_count
-            summary_ws['A5'] = "Incomplete Tasks:"
-            summary_ws['B5'] = incomplete_count
-
-            summary_ws['A6'] = "Export Date:"
-            summary_ws['B6'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            # Style the summary sheet
-            summary_ws['A1'].fill = header_fill
-            summary_ws['A1'].font = Font(size=16, bold=True, color="FFFFFF")
-
-            for row in range(3, 7):
-                summary_ws[f'A{row}'].font = Font(bold=True)
-
-            # Save the Excel file
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            excel_filename = f"todo_tasks_{timestamp}.xlsx"
-            excel_filepath = os.path.join(os.path.dirname(__file__), excel_filename)
-
-            wb.save(excel_filepath)
+            excel_filepath, reused = self._build_reports(tasks, ["xlsx"], prefix="todo_tasks")["xlsx"]
 
             # Show success with animation
             with Progress(
@@ -675,7 +611,7 @@ class TodoApp:
                 time.sleep(0.5)
 
             self.console.print(Panel(
-                f"[green]✅ Tasks exported to Excel: {excel_filepath}[/green]",
+                f"[green]✅ Tasks exported to Excel: {excel_filepath}[/green]{REUSED_NOTE if reused else ''}",
                 border_style="bright_green",
                 box=ROUNDED
             ))
@@ -700,10 +636,13 @@ class TodoApp:
             self.console.print("[yellow]No tasks to send via email.[/yellow]")
             return
 
+        # Warm the report worker while the user fills in the prompts
+        self._start_report_worker()
         try:
             # Get email details from user
             from rich.prompt import Prompt
-            recipient_email = Prompt.ask("Enter recipient's email address")
+            recipient_email = Prompt.ask("Enter recipient's email address (separate several with commas)")
+            recipients = [address.strip() for address in recipient_email.split(",") if address.strip()]
             subject = Prompt.ask("Enter email subject", default="Todo Tasks Report")
             message_body = Prompt.ask("Enter email message", default="Please find the attached todo tasks report.")
 
@@ -711,225 +650,28 @@ class TodoApp:
             attach_files = Prompt.ask("Do you want to attach Excel or PDF report? (y/n)", choices=["y", "n"], default="n")
 
             attachments = []
+            zip_files = False
             if attach_files.lower() == 'y':
                 attachment_choice = Prompt.ask("Choose attachment type: [1] Excel [2] PDF [3] Both", choices=["1", "2", "3"], default="1")
 
-                # Generate attachments based on user choice
-                from datetime import datetime
-                import os
-
-                if attachment_choice in ["1", "3"]:
-                    # Export to Excel and get file path
-                    from openpyxl import Workbook
-                    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-                    from openpyxl.utils import get_column_letter
-
-                    wb = Workbook()
-                    ws = wb.active
-                    ws.title = "Todo Tasks"
-
-                    # Define styles
-                    header_font = Font(bold=True, color="FFFFFF")
-                    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                    center_alignment = Alignment(horizontal="center", vertical="center")
-                    border = Border(
-                        left=Side(style='thin'),
-                        right=Side(style='thin'),
-                        top=Side(style='thin'),
-                        bottom=Side(style='thin')
-                    )
-
-                    # Add headers
-                    headers = ["ID", "Title", "Description", "Status"]
-                    for col, header in enumerate(headers, 1):
-                        cell = ws.cell(row=1, column=col, value=header)
-                        cell.font = header_font
-                        cell.fill = header_fill
-                        cell.alignment = center_alignment
-                        cell.border = border
-
-                    # Add tasks data
-                    for row, task in enumerate(tasks, 2):
-                        status = "Complete" if task.completed else "Incomplete"
-
-                        # Add data to cells
-                        ws.cell(row=row, column=1, value=task.id).border = border
-                        ws.cell(row=row, column=2, value=task.title).border = border
-                        ws.cell(row=row, column=3, value=task.description).border = border
-
-                        # Add status with color coding
-                        status_cell = ws.cell(row=row, column=4, value=status)
-                        status_cell.border = border
-                        if task.completed:
-                            status_cell.font = Font(color="009900")  # Green for complete
-                        else:
-                            status_cell.font = Font(color="FF0000")  # Red for incomplete
-
-                        # Center align the content
-                        for col in range(1, 5):
-                            ws.cell(row=row, column=col).alignment = center_alignment
-
-                    # Auto-adjust column widths
-                    for column in ws.columns:
-                        max_length = 0
-                        column_letter = get_column_letter(column[0].column)
-
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-
-                        adjusted_width = min(max_length + 2, 50)  # Limit max width to 50
-                        ws.column_dimensions[column_letter].width = adjusted_width
-
-                    # Add a summary sheet
-                    summary_ws = wb.create_sheet(title="Summary")
-
-                    # Add summary information
-                    summary_ws['A1'] = "Todo Application Summary"
-                    summary_ws['A1'].font = Font(size=16, bold=True)
-
-                    summary_ws['A3'] = "Total Tasks:"
-                    summary_ws['B3'] = len(tasks)
-
-                    completed_count = sum(1 for task in tasks if task.completed)
-                    summary_ws['A4'] = "Completed Tasks:"
-                    summary_ws['B4'] = completed_count
-
-                    incomplete_count = len(tasks) - completed_count
-                    summary_ws['A5'] = "Incomplete Tasks:"
-                    summary_ws['B5'] = incomplete_count
-
-                    summary_ws['A6'] = "Export Date:"
-                    summary_ws['B6'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                    # Style the summary sheet
-                    summary_ws['A1'].fill = header_fill
-                    summary_ws['A1'].font = Font(size=16, bold=True, color="FFFFFF")
-
-                    for row in range(3, 7):
-                        summary_ws[f'A{row}'].font = Font(bold=True)
-
-                    # Save the Excel file
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    excel_filename = f"todo_tasks_email_{timestamp}.xlsx"
-                    excel_filepath = os.path.join(os.path.dirname(__file__), excel_filename)
-
-                    wb.save(excel_filepath)
-                    attachments.append(excel_filepath)
-
-                if attachment_choice in ["2", "3"]:
-                    # Generate PDF and get file path
-                    from reportlab.lib.pagesizes import letter
-                    from reportlab.platypus import SimpleDocTemplate, Table as RLTable, TableStyle, Paragraph, Spacer
-                    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                    from reportlab.lib import colors
-
-                    pdf_filename = f"todo_tasks_email_{timestamp}.pdf"
-                    pdf_filepath = os.path.join(os.path.dirname(__file__), pdf_filename)
-
-                    # Create PDF document
-                    doc = SimpleDocTemplate(pdf_filepath, pagesize=letter)
-                    elements = []
-
-                    # Add title
-                    styles = getSampleStyleSheet()
-                    title_style = ParagraphStyle(
-                        'CustomTitle',
-                        parent=styles['Heading1'],
-                        fontSize=18,
-                        spaceAfter=30,
-                        alignment=1  # Center alignment
-                    )
-                    title = Paragraph("Todo Tasks Report", title_style)
-                    elements.append(title)
-
-                    # Add generation date
-                    date_style = ParagraphStyle(
-                        'CustomDate',
-                        parent=styles['Normal'],
-                        fontSize=12,
-                        spaceAfter=20,
-                        alignment=1  # Center alignment
-                    )
-                    date_para = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", date_style)
-                    elements.append(date_para)
-
-                    # Add summary table
-                    completed_count = sum(1 for task in tasks if task.completed)
-                    incomplete_count = len(tasks) - completed_count
-                    summary_data = [
-                        ['Metric', 'Count'],
-                        ['Total Tasks', str(len(tasks))],
-                        ['Completed Tasks', str(completed_count)],
-                        ['Incomplete Tasks', str(incomplete_count)]
-                    ]
-
-                    summary_table_pdf = RLTable(summary_data)
-                    summary_table_pdf.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 14),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 1), (-1, -1), 12),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                    ]))
-
-                    elements.append(summary_table_pdf)
-                    elements.append(Spacer(1, 20))
-
-                    # Add tasks header
-                    tasks_header = Paragraph("Task Details", styles['Heading2'])
-                    elements.append(tasks_header)
-                    elements.append(Spacer(1, 10))
-
-                    # Add tasks table
-                    task_data = [['ID', 'Title', 'Description', 'Status']]
-                    for task in tasks:
-                        status = "Complete" if task.completed else "Incomplete"
-                        task_data.append([str(task.id), task.title, task.description, status])
-
-                    task_table_pdf = RLTable(task_data)
-                    task_table_pdf.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 12),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 1), (-1, -1), 10),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        # Color the status column based on completion
-                        ('TEXTCOLOR', (3, 1), (3, -1), colors.red),  # Default to red for all statuses
-                    ]))
-
-                    # Apply specific colors based on status
-                    for i, task in enumerate(tasks, start=1):
-                        if task.completed:
-                            task_table_pdf.setStyle(TableStyle([
-                                ('TEXTCOLOR', (3, i), (3, i), colors.green)
-                            ]))
-
-                    elements.append(task_table_pdf)
-
-                    # Build PDF
-                    doc.build(elements)
-                    attachments.append(pdf_filepath)
+                # Generate attachments based on user choice (cached reports
+                # of unchanged tasks are reused)
+                formats = {"1": ["xlsx"], "2": ["pdf"], "3": ["xlsx", "pdf"]}[attachment_choice]
+                paths = self._build_reports(tasks, formats, prefix="todo_tasks_email", title="Todo Tasks Report")
+                attachments = [paths[fmt][0] for fmt in formats]
+                if len(attachments) > 1:
+                    zip_files = Prompt.ask("Bundle the attachments into one zip file? (y/n)", choices=["y", "n"], default="n") == 'y'
 
             # Show email summary
             self.console.print(f"[bold blue]Email Summary:[/bold blue]")
-            self.console.print(f"Recipient: {recipient_email}")
+            if len(recipients) > 1:
+                self.console.print(f"Recipients: {len(recipients)} ($name and $email are filled in per recipient)")
+            else:
+                self.console.print(f"Recipient: {recipient_email}")
             self.console.print(f"Subject: {subject}")
             self.console.print(f"Message: {message_body}")
             if attachments:
-                self.console.print(f"Attachments: {len(attachments)} file(s)")
+                self.console.print(f"Attachments: {len(attachments)} file(s){' in one zip' if zip_files else ''}")
 
             # Ask for confirmation before sending
             confirm = Prompt.ask("Do you want to send this email? (y/n)", choices=["y", "n"], default="n")
@@ -937,67 +679,27 @@ class TodoApp:
             if confirm.lower() == 'y':
                 # Check if email configuration exists for real email sending
                 try:
-                    from email_sender import send_real_email, EmailConfig
+                    from email_sender import EmailConfig
                     config = EmailConfig()
-
-                    # Check if we have proper configuration by checking if it's still the default
-                    # The default is 'your_email@gmail.com', so if it's different, we have a config
-                    has_valid_config = (
-                        config.sender_email != 'your_email@gmail.com' and
-                        config.sender_email and
-                        config.sender_email.strip() != ''
-                    )
-
-                    if has_valid_config:
-                        # Attempt to send real email
-                        success = send_real_email(
-                            recipient_email=recipient_email,
-                            subject=subject,
-                            message_body=message_body,
-                            attachments=attachments,
-                            config=config
-                        )
-
-                        if success:
-                            self.console.print(f"[green]Email sent successfully to: {recipient_email}[/green]")
-                        else:
-                            self.console.print("[red]Failed to send email. Using simulation mode.[/red]")
-                            # Fall back to simulation
-                            self._simulate_email_sending(recipient_email)
-                    else:
-                        # No configuration provided, use simulation
-                        self.console.print("[yellow]Email configuration not set. Using simulation mode.[/yellow]")
-                        self.console.print("[yellow]Note: Please check your .env file configuration.[/yellow]")
-                        self._simulate_email_sending(recipient_email)
-
                 except ImportError as e:
                     # email_sender module not available, use simulation
                     self.console.print(f"[yellow]Import error: {str(e)}[/yellow]")
                     self.console.print("[yellow]Email module not available. Using simulation mode.[/yellow]")
                     self.console.print("[yellow]Note: email_sender module not found.[/yellow]")
                     self._simulate_email_sending(recipient_email)
-                except Exception as e:
-                    # Other errors (like authentication errors during email sending)
-                    self.console.print(f"[yellow]Email sending error: {str(e)}[/yellow]")
-                    self.console.print("[yellow]Falling back to simulation mode.[/yellow]")
-                    self._simulate_email_sending(recipient_email)
+                    return
 
-                # Clean up temporary files after sending
-                for attachment in attachments:
-                    try:
-                        os.remove(attachment)
-                    except:
-                        pass  # Ignore errors when removing temporary files
+                # A real sender address (or EMAIL_SMTP_SERVER=local) enables sending
+                if config.is_configured:
+                    self._queue_email(config, recipients, subject, message_body, attachments, zip_files)
+                else:
+                    # No configuration provided, use simulation
+                    self.console.print("[yellow]Email configuration not set. Using simulation mode.[/yellow]")
+                    self.console.print("[yellow]Note: Please check your .env file configuration.[/yellow]")
+                    self._simulate_email_sending(recipient_email)
             else:
                 self.console.print("[yellow]Email sending cancelled.[/yellow]")
 
-                # Clean up temporary files if email was cancelled
-                for attachment in attachments:
-                    try:
-                        os.remove(attachment)
-                    except:
-                        pass  # Ignore errors when removing temporary files
-
         except Exception as e:
             self.console.print(Panel(
                 f"[red]❌ Error sending email: {str(e)}[/red]",
@@ -1005,6 +707,102 @@ class TodoApp:
                 box=ROUNDED
             ))
 
+    def _queue_email(self, config, recipients, subject, message_body, attachments, zip_files):
+        """Queue the message on disk and wake the outbox worker to deliver it
+        (with retries) while the menu stays responsive"""
+        from outbox import Outbox
+        try:
+            message_id = Outbox().enqueue(recipients, subject, message_body, attachments, zip_files)
+        except Exception as e:
+            self.console.print(Panel(
+                f"[red]❌ Email could not be queued: {str(e)}[/red]\n"
+                "[dim]Nothing was sent.[/dim]",
+                border_style="red",
+                box=ROUNDED
+            ))
+            return
+
+        try:
+            self._start_outbox_worker(config).wake()
+        except Exception as e:
+            self.console.print(Panel(
+                f"[yellow]📬 Email queued for {len(recipients)} recipient(s) (message {message_id}), "
+                f"but delivery was not started: {str(e)}[/yellow]\n"
+                "[dim]It stays in 📬 Email Queue (option 11) until delivery can start.[/dim]",
+                border_style="yellow",
+                box=ROUNDED
+            ))
+            return
+
+        self.console.print(Panel(
+            f"[green]📬 Email queued for {len(recipients)} recipient(s) (message {message_id}).[/green]\n"
+            "[dim]It is delivered in the background; see 📬 Email Queue (option 11).[/dim]",
+            border_style="bright_green",
+            box=ROUNDED
+        ))
+
+    def _start_outbox_worker(self, config=None):
+        """Start (or return) the background email delivery thread"""
+        if self._outbox_worker is None or not self._outbox_worker.is_alive():
+            from outbox import OutboxWorker
+            self._outbox_worker = OutboxWorker(config=config)
+            self._outbox_worker.start()
+        return self._outbox_worker
+
+    def email_queue(self):
+        """Show the email outbox: counts, queued and failed messages"""
+        from outbox import Outbox
+        outbox = Outbox()
+        while True:
+            counts = outbox.counts()
+            worker = self._outbox_worker
+            worker_state = "running" if worker and worker.is_alive() else "stopped"
+            self.console.print(Panel(
+                f"[yellow]Queued:[/yellow] {counts['pending']}   [cyan]Sending:[/cyan] {counts['inflight']}   "
+                f"[green]Sent:[/green] {counts['sent']}   [red]Failed:[/red] {counts['failed']}\n"
+                f"[dim]Background delivery: {worker_state}"
+                f"{f' (last error: {worker.last_error})' if worker and worker.last_error else ''}[/dim]",
+                title="[bold cyan]📬 EMAIL QUEUE[/bold cyan]",
+                border_style="bright_blue",
+                box=ROUNDED
+            ))
+
+            table = RichTable(show_header=True, header_style="bold magenta", box=ROUNDED)
+            table.add_column("Message", style="dim")
+            table.add_column("State")
+            table.add_column("Subject")
+            table.add_column("Undelivered", justify="right")
+            table.add_column("Attempts", justify="right")
+            table.add_column("Next try / error")
+            now = time.time()
+            for state, style in (("inflight", "cyan"), ("pending", "yellow"), ("failed", "red")):
+                for record in outbox.messages(state, limit=SEARCH_RESULTS_SHOWN):
+                    if state == "pending":
+                        wait = record["next_attempt"] - now
+                        detail = f"in {wait:.0f}s" if wait > 1 else "now"
+                        if record["last_error"]:
+                            detail += f" — {record['last_error']}"
+                    else:
+                        detail = record["last_error"] or ""
+                    pending = len(record["recipients"]) + len(record["undelivered"])
+                    table.add_row(record["id"], f"[{style}]{state}[/{style}]", record["subject"],
+                                  f"{pending}/{pending + len(record['sent'])}",
+                                  str(record["attempts"]), detail)
+            if table.row_count:
+                self.console.print(table)
+
+            action = Prompt.ask("\\[r]efresh, retry \\[f]ailed, \\[b]ack", choices=["r", "f", "b"], default="b")
+            if action == "b":
+                return
+            if action == "f":
+                retried = outbox.retry_failed()
+                self.console.print(f"[green]Queued {retried} failed message(s) again[/green]")
+                if retried:
+                    try:
+                        self._start_outbox_worker().wake()
+                    except ValueError as e:
+                        self.console.print(f"[red]Error starting email delivery: {e}[/red]")
+
     def _simulate_email_sending(self, recipient_email):
         """Helper method to simulate email sending"""
         from rich.progress import Progress, SpinnerColumn
@@ -1025,5 +823,41 @@ class TodoApp:
         ))
 
 if __name__ == "__main__":
-    app = TodoApp()
-    app.run()
\ No newline at end of file
+    import os
+    import sys
+    # --metrics=FILE (or TODO_METRICS_FILE) times every action and writes the
+    # metrics to FILE at exit; --profile[=FILE] runs under cProfile
+    args, metrics_file, profile_file = [], os.getenv('TODO_METRICS_FILE'), None
+    for arg in sys.argv[1:]:
+        if arg.startswith("--metrics="):
+            metrics_file = arg.partition("=")[2]
+        elif arg == "--profile" or arg.startswith("--profile="):
+            profile_file = arg.partition("=")[2] or "todo_app.pstats"
+        else:
+            args.append(arg)
+    if metrics_file:
+        metrics.enable(metrics_file)
+        metrics.instrument_app(TodoApp)
+
+    if args:
+        # Arguments switch to the headless command mode (see cli.py)
+        import cli
+        main = lambda: cli.main(args)
+    else:
+        main = lambda: TodoApp().run()
+    from file_lock import StorageBusyError
+    try:
+        if profile_file:
+            import cProfile
+            profiler = cProfile.Profile()
+            try:
+                status = profiler.runcall(main)
+            finally:
+                profiler.dump_stats(profile_file)
+                print(f"Profile written to {profile_file} (view it with: python -m pstats {profile_file})")
+        else:
+            status = main()
+    except StorageBusyError as e:
+        print(f"Error: {e}")
+        status = 1
+    sys.exit(status)
\ No newline at end of file
@@ -0,0 +1,313 @@
+"""
+Compact binary snapshot format for todos, loaded through mmap.
+
+Layout (all integers little-endian):
+
+    header      magic b"TDOB", uint16 version, uint16 flags, uint64 count
+    ids         count x int64
+    completed   count x uint8, zero-padded to a multiple of 8 bytes
+    offsets     count x uint64, start of each record in the string section
+    strings     per record: uint32 length + UTF-8 title,
+                            uint32 length + UTF-8 description
+
+The fixed-width arrays let a reader find any record without parsing the
+ones before it, so MappedTodoStore only decodes the todos that are used.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from todo import Todo
+from journal import TodoJournal
+from storage import JournaledStorage, atomic_write_bytes, atomic_write_text, iter_json_array
+
+MAGIC = b"TDOB"
+VERSION = 1
+FLAG_SORTED_IDS = 1
+HEADER = struct.Struct("<4sHHQ")
+LENGTH = struct.Struct("<I")
+
+
+def binary_path_for(data_file):
+    """Snapshot file used by the binary backend for a given todos.json path"""
+    return os.path.splitext(data_file)[0] + ".bin"
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_snapshot(todos):
+    """Yield the binary snapshot for an iterable of todos as byte chunks"""
+    ids = array('q')
+    completed = bytearray()
+    offsets = array('Q')
+    strings = []
+    position = 0
+    for todo in todos:
+        ids.append(todo.id)
+        completed.append(1 if todo.completed else 0)
+        offsets.append(position)
+        for text in (todo.title, todo.description):
+            data = text.encode('utf-8')
+            strings.append(LENGTH.pack(len(data)))
+            strings.append(data)
+            position += LENGTH.size + len(data)
+
+    flags = FLAG_SORTED_IDS if all(a < b for a, b in zip(ids, ids[1:])) else 0
+    yield HEADER.pack(MAGIC, VERSION, flags, len(ids))
+    yield _little_endian(ids)
+    yield bytes(completed) + b"\0" * (-len(completed) % 8)
+    yield _little_endian(offsets)
+    yield from strings
+
+
+def write_snapshot(path, todos):
+    """Atomically write todos to a binary snapshot file"""
+    atomic_write_bytes(path, encode_snapshot(todos))
+
+
+class MappedSnapshot:
+    """Read-only view of a binary snapshot file through mmap"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flags, count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} todo snapshot")
+        self.count = count
+        self.sorted_ids = bool(flags & FLAG_SORTED_IDS)
+
+        self._view = view = memoryview(self._mm)
+        ids_start = HEADER.size
+        flags_start = ids_start + 8 * count
+        offsets_start = flags_start + count + (-count % 8)
+        self._strings_start = offsets_start + 8 * count
+        self.ids = self._column(view, ids_start, count, 'q')
+        self.completed = view[flags_start:flags_start + count]
+        self._offsets = self._column(view, offsets_start, count, 'Q')
+
+    @staticmethod
+    def _column(view, start, count, typecode):
+        column = view[start:start + 8 * count]
+        if sys.byteorder == "big":
+            values = array(typecode, column.tobytes())
+            values.byteswap()
+            return values
+        return column.cast(typecode)
+
+    def _string(self, position):
+        (length,) = LENGTH.unpack_from(self._mm, position)
+        start = position + LENGTH.size
+        return str(self._mm[start:start + length], 'utf-8'), start + length
+
+    def record(self, row):
+        """Decode the todo stored at a row index"""
+        position = self._strings_start + self._offsets[row]
+        title, position = self._string(position)
+        description, _ = self._string(position)
+        todo = Todo.__new__(Todo)
+        todo.id = self.ids[row]
+        todo.title = title
+        todo.description = description
+        todo.completed = bool(self.completed[row])
+        return todo
+
+    def close(self):
+        # Views into the map must be released before it can be closed
+        for column in (self.ids, self.completed, self._offsets, self._view):
+            if isinstance(column, memoryview):
+                column.release()
+        self._mm.close()
+
+
+class MappedTodoStore:
+    """Insertion-ordered id -> Todo store over a MappedSnapshot.
+
+    Todos are decoded from the map the first time they are accessed and
+    cached, so in-place edits stick; deletions and new todos are kept in
+    small overlays on top of the read-only snapshot. Supports the same
+    subset of the dict API as ColumnarTodoStore.
+    """
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        self._ids = snapshot.ids
+        self._rows = None if snapshot.sorted_ids else {todo_id: row for row, todo_id in enumerate(self._ids)}
+        self._loaded = {}
+        self._deleted = set()
+        self._added = {}
+        self._base_count = snapshot.count
+
+    def _base_row(self, todo_id):
+        if todo_id in self._deleted:
+            return None
+        if self._rows is not None:
+            return self._rows.get(todo_id)
+        row = bisect_left(self._ids, todo_id)
+        if row < len(self._ids) and self._ids[row] == todo_id:
+            return row
+        return None
+
+    def _materialize(self, row):
+        todo_id = self._ids[row]
+        todo = self._loaded.get(todo_id)
+        if todo is None:
+            todo = self._snapshot.record(row)
+            self._loaded[todo_id] = todo
+        return todo
+
+    def __len__(self):
+        return self._base_count + len(self._added)
+
+    def __contains__(self, todo_id):
+        return todo_id in self._added or self._base_row(todo_id) is not None
+
+    def __iter__(self):
+        if self._deleted:
+            for todo_id in self._ids:
+                if todo_id not in self._deleted:
+                    yield todo_id
+        else:
+            yield from self._ids
+        yield from self._added
+
+    def get(self, todo_id, default=None):
+        todo = self._added.get(todo_id)
+        if todo is not None:
+            return todo
+        row = self._base_row(todo_id)
+        if row is None:
+            return default
+        return self._materialize(row)
+
+    def __getitem__(self, todo_id):
+        todo = self.get(todo_id)
+        if todo is None:
+            raise KeyError(todo_id)
+        return todo
+
+    def values(self):
+        for row, todo_id in enumerate(self._ids):
+            if todo_id not in self._deleted:
+                yield self._materialize(row)
+        yield from self._added.values()
+
+    def __setitem__(self, todo_id, todo):
+        if todo_id not in self._added and self._base_row(todo_id) is not None:
+            self._loaded[todo_id] = todo
+        else:
+            self._added[todo_id] = todo
+
+    def pop(self, todo_id, default=None):
+        if todo_id in self._added:
+            return self._added.pop(todo_id)
+        row = self._base_row(todo_id)
+        if row is None:
+            return default
+        todo = self._materialize(row)
+        del self._loaded[todo_id]
+        self._deleted.add(todo_id)
+        self._base_count -= 1
+        return todo
+
+    def detach(self):
+        """Decode every remaining todo and release the underlying map"""
+        if self._snapshot is None:
+            return
+        for row, todo_id in enumerate(self._ids):
+            if todo_id not in self._deleted:
+                self._materialize(row)
+        # From here on the cache and the overlay hold everything
+        self._ids = array('q', self._ids)
+        self._snapshot.close()
+        self._snapshot = None
+
+
+class BinarySnapshotStorage(JournaledStorage):
+    """Binary snapshot file, loaded lazily through mmap.
+
+    Changes go to the journal ("<path>.log") and are replayed over the
+    mapped store on load, so an edit costs one small append instead of a
+    rewrite. Only compaction (past the journal's record or size threshold,
+    or a full save) decodes every todo and writes a new snapshot.
+    """
+
+    lazy = True
+
+    def __init__(self, path, journal_max_records=1000, journal_max_bytes=1024 * 1024):
+        super().__init__(path, True, journal_max_records, journal_max_bytes)
+        self._store = None
+
+    def _load_snapshot(self):
+        self._release_snapshot()
+        if os.path.exists(self.path):
+            try:
+                self._store = MappedTodoStore(MappedSnapshot(self.path))
+                return self._store
+            except Exception as e:
+                print(f"Error loading snapshot: {e}")
+        return {}
+
+    def _read_snapshot(self):
+        todos = {}
+        if os.path.exists(self.path):
+            snapshot = MappedSnapshot(self.path)
+            try:
+                for row in range(snapshot.count):
+                    todo = snapshot.record(row)
+                    todos[todo.id] = todo
+            finally:
+                snapshot.close()
+        return todos
+
+    def _write_snapshot(self, todos):
+        write_snapshot(self.path, todos)
+
+    def _release_snapshot(self):
+        # Required on Windows before the file is replaced, where a mapped
+        # file cannot be renamed over
+        if self._store is not None:
+            self._store.detach()
+            self._store = None
+
+
+def json_to_binary(json_file, binary_file):
+    """Convert a todos.json file to a binary snapshot; return the record count"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        todos = [Todo.from_dict(item) for item in iter_json_array(f)]
+    write_snapshot(binary_file, todos)
+    # A journal left from an earlier snapshot must not be replayed over this one
+    TodoJournal(binary_file + ".log").clear()
+    return len(todos)
+
+
+def binary_to_json(binary_file, json_file):
+    """Convert a binary snapshot (and its journal) back to todos.json; return the record count"""
+    source = BinarySnapshotStorage(binary_file)
+    try:
+        data = [todo.to_dict() for todo in source._read().values()]
+    finally:
+        source.close()
+    atomic_write_text(json_file, json.dumps(data, indent=2))
+    return len(data)
+
+
+if __name__ == "__main__":
+    # python src/binary_snapshot.py to-binary todos.json todos.bin
+    # python src/binary_snapshot.py to-json todos.bin todos.json
+    if len(sys.argv) != 4 or sys.argv[1] not in ("to-binary", "to-json"):
+        print("Usage: python binary_snapshot.py to-binary|to-json SOURCE TARGET")
+        sys.exit(1)
+    convert = json_to_binary if sys.argv[1] == "to-binary" else binary_to_json
+    count = convert(sys.argv[2], sys.argv[3])
+    print(f"Converted {count} todos from {sys.argv[2]} to {sys.argv[3]}")
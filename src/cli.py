@@ -0,0 +1,320 @@
+"""
+Headless command mode for the Todo application.
+
+Runs one command against TodoManager and exits, with no prompts, panels or
+spinners, so shell scripts can drive the app:
+
+    python src/app.py add "Write report" --description "Q3 numbers"
+    python src/app.py list --status pending --json
+    python src/app.py toggle 3 4 5
+    python src/app.py report --format pdf
+    python src/app.py email --recipients-file team.csv --subject 'Tasks for $name' --attach pdf
+
+Text output is one line per task (or per generated file); --json prints a
+single JSON document instead; --json, --data-file and --storage may go
+before or after the command. Commands that take many titles or ids apply
+them in one TodoManager.batch(), i.e. with a single save. Exit status is 0
+on success, 1 if a task was not found or an action failed, and 2 for usage
+errors.
+"""
+import argparse
+import json
+import os
+import sys
+
+from file_lock import StorageBusyError
+from todo_manager import TodoManager
+
+DEFAULT_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "todos.json")
+STATUS_FILTERS = {"all": None, "pending": False, "completed": True}
+
+
+def _emit(args, data, lines):
+    """Print data as JSON with --json, otherwise the given text lines"""
+    if args.json:
+        print(json.dumps(data))
+    else:
+        for line in lines:
+            print(line)
+
+
+def _read_items(args):
+    """Titles from the command line, or "title<TAB>description" lines from stdin"""
+    if args.titles == ["-"]:
+        items = []
+        for line in sys.stdin:
+            line = line.rstrip("\n")
+            if line:
+                title, _, description = line.partition("\t")
+                items.append((title, description))
+        return items
+    return [(title, args.description) for title in args.titles]
+
+
+def cmd_add(manager, args):
+    added = manager.add_many(_read_items(args))
+    _emit(args, [todo.to_dict() for todo in added], (str(todo) for todo in added))
+    return 0
+
+
+def cmd_list(manager, args):
+    completed = STATUS_FILTERS[args.status]
+    limit = manager.count() if args.limit is None else args.limit
+    todos = manager.get_page(args.offset, limit, completed)
+    _emit(args, [todo.to_dict() for todo in todos], (str(todo) for todo in todos))
+    return 0
+
+
+def cmd_update(manager, args):
+    if args.title is None and args.description is None:
+        print("Error: nothing to update (use --title and/or --description)", file=sys.stderr)
+        return 2
+    if not manager.update_todo(args.id, args.title, args.description):
+        print(f"Error: task {args.id} not found", file=sys.stderr)
+        return 1
+    todo = manager.find_todo_by_id(args.id)
+    _emit(args, todo.to_dict(), [str(todo)])
+    return 0
+
+
+def cmd_delete(manager, args):
+    ids = list(dict.fromkeys(args.ids))  # "delete 3 3" deletes task 3 once
+    with manager.batch():
+        missing = [todo_id for todo_id in ids if not manager.delete_todo(todo_id)]
+    deleted = [todo_id for todo_id in ids if todo_id not in missing]
+    _emit(args, {"deleted": deleted, "missing": missing},
+          [f"Deleted {todo_id}" for todo_id in deleted])
+    for todo_id in missing:
+        print(f"Error: task {todo_id} not found", file=sys.stderr)
+    return 1 if missing else 0
+
+
+def cmd_toggle(manager, args):
+    ids = list(dict.fromkeys(args.ids))  # Repeating an id toggles it once
+    with manager.batch():
+        missing = [todo_id for todo_id in ids if not manager.toggle_complete(todo_id)]
+    todos = [manager.find_todo_by_id(todo_id) for todo_id in ids if todo_id not in missing]
+    _emit(args, {"toggled": [todo.to_dict() for todo in todos], "missing": missing},
+          (str(todo) for todo in todos))
+    for todo_id in missing:
+        print(f"Error: task {todo_id} not found", file=sys.stderr)
+    return 1 if missing else 0
+
+
+def _write_reports(manager, args, formats):
+    import reports
+    tasks = manager.get_all_todos()
+    paths = {}
+    try:
+        if args.output:
+            # An explicit path is always written fresh
+            base_path = os.path.splitext(args.output)[0]
+            for fmt in formats:
+                paths[fmt] = reports.WRITERS[fmt](tasks, f"{base_path}.{fmt}")
+        else:
+            built = reports.build_reports(tasks, formats, prefix=args.prefix, directory=args.output_dir)
+            paths = {fmt: path for fmt, (path, _) in built.items()}
+    except Exception as e:
+        print(f"Error generating report: {e}", file=sys.stderr)
+        return 1
+    _emit(args, paths, paths.values())
+    return 0
+
+
+def cmd_export(manager, args):
+    return _write_reports(manager, args, ["xlsx"])
+
+
+def cmd_report(manager, args):
+    formats = args.format.split(",")
+    if "all" in formats:
+        formats = ["txt", "pdf", "xlsx"]
+    return _write_reports(manager, args, formats)
+
+
+def _read_recipients(args):
+    """Addresses from the command line plus rows of --recipients-file.
+
+    The file is CSV with a header row; its "email" column is the address and
+    every column can be used as a $placeholder in the subject and message.
+    """
+    recipients = list(args.recipients)
+    if args.recipients_file:
+        import csv
+        with open(args.recipients_file, newline='', encoding='utf-8') as f:
+            recipients.extend(row for row in csv.DictReader(f) if row.get("email"))
+    return recipients
+
+
+def cmd_email(manager, args):
+    from email_sender import EmailConfig, send_bulk
+    config = EmailConfig()
+    if not config.is_configured:
+        print("Error: email is not configured (see EMAIL_CONFIG.md)", file=sys.stderr)
+        return 1
+    try:
+        recipients = _read_recipients(args)
+    except Exception as e:
+        print(f"Error reading recipients: {e}", file=sys.stderr)
+        return 1
+    if not recipients:
+        print("Error: no recipients (give addresses or --recipients-file)", file=sys.stderr)
+        return 2
+
+    attachments = []
+    if args.attach != "none":
+        import reports
+        formats = {"excel": ["xlsx"], "pdf": ["pdf"], "both": ["xlsx", "pdf"]}[args.attach]
+        built = reports.build_reports(manager.get_all_todos(), formats,
+                                      prefix="todo_tasks_email", title="Todo Tasks Report")
+        attachments = [built[fmt][0] for fmt in formats]
+
+    if args.queue:
+        from outbox import Outbox
+        zip_attachments = config.zip_attachments if args.zip is None else args.zip
+        try:
+            message_id = Outbox().enqueue(recipients, args.subject, args.message, attachments, zip_attachments)
+        except OSError as e:
+            print(f"Error queueing email: {e}", file=sys.stderr)
+            return 1
+        _emit(args, {"queued": message_id, "recipients": len(recipients)},
+              [f"Queued message {message_id} for {len(recipients)} recipient(s)"])
+        return 0
+
+    results = send_bulk(recipients, args.subject, args.message, attachments, config, zip_attachments=args.zip)
+    sent = [address for address, ok in results.items() if ok]
+    failed = [address for address, ok in results.items() if not ok]
+    _emit(args, {"sent": sent, "failed": failed},
+          [f"Email sent to {address}" if ok else f"Failed to send email to {address}" for address, ok in results.items()])
+    return 1 if failed else 0
+
+
+def cmd_outbox(manager, args):
+    from outbox import Outbox, OutboxWorker
+    outbox = Outbox()
+    retried = outbox.retry_failed() if args.retry_failed else 0
+    attempted = 0
+    if args.flush:
+        try:
+            worker = OutboxWorker(outbox)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        outbox.recover()
+        attempted = worker.process_due()
+    counts = outbox.counts()
+    lines = [f"{state}: {count}" for state, count in counts.items()]
+    if args.retry_failed:
+        lines.append(f"retried: {retried}")
+    if args.flush:
+        lines.append(f"attempted: {attempted}")
+    _emit(args, dict(counts, retried=retried, attempted=attempted), lines)
+    return 0
+
+
+def _non_negative_int(value):
+    """argparse type for counts such as --offset and --limit"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a whole number: {value}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return number
+
+
+def _add_common_options(parser, defaults=True):
+    """--data-file, --storage and --json; without defaults the options only
+    override what was given before the command when they are used"""
+    def default(value):
+        return value if defaults else argparse.SUPPRESS
+
+    parser.add_argument("--data-file", default=default(DEFAULT_DATA_FILE), help="todos file (default: src/todos.json)")
+    parser.add_argument("--storage", choices=["json", "journal", "sqlite", "binary"], default=default(None),
+                        help="storage backend (default: TODO_STORAGE or json)")
+    parser.add_argument("--json", action="store_true", default=default(False), help="print JSON instead of text")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="todo", description="Run one todo command without the interactive menu")
+    _add_common_options(parser)
+    # The same options are accepted after the command, e.g. "list --json"
+    common = argparse.ArgumentParser(add_help=False)
+    _add_common_options(common, defaults=False)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", parents=[common], help="add one or more tasks")
+    add.add_argument("titles", nargs="+", metavar="TITLE",
+                     help='task title(s); "-" reads "title<TAB>description" lines from stdin')
+    add.add_argument("--description", default="")
+    add.set_defaults(handler=cmd_add)
+
+    list_ = commands.add_parser("list", parents=[common], help="list tasks")
+    list_.add_argument("--status", choices=list(STATUS_FILTERS), default="all")
+    list_.add_argument("--offset", type=_non_negative_int, default=0)
+    list_.add_argument("--limit", type=_non_negative_int)
+    list_.set_defaults(handler=cmd_list)
+
+    update = commands.add_parser("update", parents=[common], help="change a task's title or description")
+    update.add_argument("id", type=int)
+    update.add_argument("--title")
+    update.add_argument("--description")
+    update.set_defaults(handler=cmd_update)
+
+    delete = commands.add_parser("delete", parents=[common], help="delete tasks by id")
+    delete.add_argument("ids", nargs="+", type=int, metavar="ID")
+    delete.set_defaults(handler=cmd_delete)
+
+    toggle = commands.add_parser("toggle", parents=[common], help="mark/unmark tasks complete")
+    toggle.add_argument("ids", nargs="+", type=int, metavar="ID")
+    toggle.set_defaults(handler=cmd_toggle)
+
+    for name, handler, help_text in (("export", cmd_export, "export tasks to Excel"),
+                                     ("report", cmd_report, "write the final record")):
+        command = commands.add_parser(name, parents=[common], help=help_text)
+        command.add_argument("--output", help="output path (extension is set per format)")
+        command.add_argument("--output-dir", help="directory for cached reports (default: TODO_REPORT_DIR or src/reports)")
+        command.set_defaults(handler=handler, prefix="todo_tasks" if name == "export" else "final_record")
+        if name == "report":
+            command.add_argument("--format", default="all",
+                                 help="comma-separated txt, pdf, xlsx, or all (default: all, rendered in parallel)")
+
+    email = commands.add_parser("email", parents=[common], help="email the task report")
+    email.add_argument("recipients", nargs="*", metavar="RECIPIENT")
+    email.add_argument("--recipients-file", help='CSV with an "email" column; other columns fill $placeholders')
+    email.add_argument("--subject", default="Todo Tasks Report", help="subject; $name, $email and CSV columns are filled in")
+    email.add_argument("--message", default="Please find the attached todo tasks report.", help="message body, templated like --subject")
+    email.add_argument("--attach", choices=["none", "excel", "pdf", "both"], default="none")
+    email.add_argument("--zip", action="store_true", default=None,
+                       help="send the attachments as one zip file (default: EMAIL_ZIP_ATTACHMENTS)")
+    email.add_argument("--queue", action="store_true",
+                       help="add to the outbox instead of sending now (deliver with: outbox --flush)")
+    email.set_defaults(handler=cmd_email)
+
+    outbox = commands.add_parser("outbox", parents=[common], help="show the email outbox, or deliver what is due")
+    outbox.add_argument("--flush", action="store_true", help="deliver every due message now")
+    outbox.add_argument("--retry-failed", action="store_true", help="queue failed messages again")
+    outbox.set_defaults(handler=cmd_outbox)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "report":
+        unknown = set(args.format.split(",")) - {"txt", "pdf", "xlsx", "all"}
+        if unknown:
+            parser.error(f"unknown report format(s): {', '.join(sorted(unknown))}")
+    try:
+        manager = TodoManager(data_file=args.data_file, storage=args.storage)
+    except StorageBusyError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    try:
+        return args.handler(manager, args)
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
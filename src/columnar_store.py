@@ -0,0 +1,257 @@
+"""
+Columnar in-memory store for TodoManager.
+
+Instead of one Python object per task, the fields live in parallel columns:
+ids in an array('q'), completed flags in a bytearray, and titles/descriptions
+as indexes into a reference-counted table of interned strings (repeated
+titles such as "Follow up" are stored once). get() hands out lightweight
+TodoRow views that read and write the columns directly; values() yields
+standalone Todo copies, so a snapshot does not change under its reader.
+"""
+import sys
+import weakref
+from array import array
+from bisect import bisect_left
+from todo import Todo
+
+_DELETED = 0xFF
+
+
+class StringTable:
+    """Reference-counted table of interned strings addressed by index"""
+
+    def __init__(self):
+        self._strings = []
+        self._refs = array('I')
+        self._index = {}
+        self._free = []
+
+    def add(self, value):
+        """Return the index for value, storing it if it is not known yet"""
+        slot = self._index.get(value)
+        if slot is None:
+            value = sys.intern(value)
+            if self._free:
+                slot = self._free.pop()
+                self._strings[slot] = value
+                self._refs[slot] = 0
+            else:
+                slot = len(self._strings)
+                self._strings.append(value)
+                self._refs.append(0)
+            self._index[value] = slot
+        self._refs[slot] += 1
+        return slot
+
+    def release(self, slot):
+        """Drop one reference to a slot, freeing it when nobody uses it"""
+        self._refs[slot] -= 1
+        if not self._refs[slot]:
+            del self._index[self._strings[slot]]
+            self._strings[slot] = None
+            self._free.append(slot)
+
+    def __getitem__(self, slot):
+        return self._strings[slot]
+
+
+class TodoRow(Todo):
+    """A view of one row in a ColumnarTodoStore that behaves like a Todo.
+
+    When the row is removed from the store the view keeps a copy of its
+    fields, like the Todo a dict store would have handed out.
+    """
+
+    __slots__ = ("_store", "_todo_id", "_fields", "__weakref__")
+
+    def __init__(self, store, todo_id):
+        self._store = store
+        self._todo_id = todo_id
+        self._fields = None
+
+    def _get(self, field):
+        if self._fields is not None:
+            return self._fields[field]
+        return self._store._get(self._todo_id, field)
+
+    def _set(self, field, value):
+        if self._fields is not None:
+            self._fields[field] = value
+        else:
+            self._store._set(self._todo_id, field, value)
+
+    def _detach(self):
+        """Copy the row's fields in before the store drops it"""
+        self._fields = {"title": self.title, "description": self.description, "completed": self.completed}
+
+    @property
+    def id(self):
+        return self._todo_id
+
+    @property
+    def title(self):
+        return self._get("title")
+
+    @title.setter
+    def title(self, value):
+        self._set("title", value)
+
+    @property
+    def description(self):
+        return self._get("description")
+
+    @description.setter
+    def description(self, value):
+        self._set("description", value)
+
+    @property
+    def completed(self):
+        return self._get("completed")
+
+    @completed.setter
+    def completed(self, value):
+        self._set("completed", value)
+
+
+class ColumnarTodoStore:
+    """Insertion-ordered id -> Todo mapping backed by compact columns.
+
+    Supports the subset of the dict API TodoManager relies on: item
+    assignment, get, pop, len, iteration over ids and values().
+    """
+
+    def __init__(self):
+        self._ids = array('q')
+        self._completed = bytearray()
+        self._titles = array('I')
+        self._descriptions = array('I')
+        self._strings = StringTable()
+        # Ids are allocated in increasing order, so rows can be found by
+        # binary search; an explicit id -> row map is only built if a caller
+        # inserts ids out of order.
+        self._rows = None
+        self._live = 0
+        # Views handed out by get(), one per id, detached by pop()
+        self._views = weakref.WeakValueDictionary()
+
+    def _find(self, todo_id):
+        if self._rows is not None:
+            return self._rows.get(todo_id)
+        row = bisect_left(self._ids, todo_id)
+        if row < len(self._ids) and self._ids[row] == todo_id and self._completed[row] != _DELETED:
+            return row
+        return None
+
+    def _row(self, todo_id):
+        row = self._find(todo_id)
+        if row is None:
+            raise KeyError(todo_id)
+        return row
+
+    def _get(self, todo_id, field):
+        row = self._row(todo_id)
+        if field == "title":
+            return self._strings[self._titles[row]]
+        if field == "description":
+            return self._strings[self._descriptions[row]]
+        return bool(self._completed[row])
+
+    def _set(self, todo_id, field, value):
+        row = self._row(todo_id)
+        if field == "completed":
+            self._completed[row] = 1 if value else 0
+            return
+        column = self._titles if field == "title" else self._descriptions
+        new_slot = self._strings.add(value)
+        self._strings.release(column[row])
+        column[row] = new_slot
+
+    def __len__(self):
+        return self._live
+
+    def __contains__(self, todo_id):
+        return self._find(todo_id) is not None
+
+    def __iter__(self):
+        for row, todo_id in enumerate(self._ids):
+            if self._completed[row] != _DELETED:
+                yield todo_id
+
+    def _view(self, todo_id):
+        view = self._views.get(todo_id)
+        if view is None:
+            view = TodoRow(self, todo_id)
+            self._views[todo_id] = view
+        return view
+
+    def get(self, todo_id, default=None):
+        if self._find(todo_id) is None:
+            return default
+        return self._view(todo_id)
+
+    def __getitem__(self, todo_id):
+        self._row(todo_id)
+        return self._view(todo_id)
+
+    def values(self):
+        strings = self._strings
+        for row, todo_id in enumerate(self._ids):
+            completed = self._completed[row]
+            if completed != _DELETED:
+                todo = Todo.__new__(Todo)
+                todo.id = todo_id
+                todo.title = strings[self._titles[row]]
+                todo.description = strings[self._descriptions[row]]
+                todo.completed = bool(completed)
+                yield todo
+
+    def __setitem__(self, todo_id, todo):
+        title, description, completed = todo.title, todo.description, todo.completed
+        row = self._find(todo_id)
+        if row is not None:
+            self._set(todo_id, "title", title)
+            self._set(todo_id, "description", description)
+            self._completed[row] = 1 if completed else 0
+            return
+
+        row = len(self._ids)
+        if self._rows is None and row and todo_id <= self._ids[-1]:
+            self._rows = {existing: r for r, existing in enumerate(self._ids)
+                          if self._completed[r] != _DELETED}
+        self._ids.append(todo_id)
+        self._completed.append(1 if completed else 0)
+        self._titles.append(self._strings.add(title))
+        self._descriptions.append(self._strings.add(description))
+        if self._rows is not None:
+            self._rows[todo_id] = row
+        self._live += 1
+
+    def pop(self, todo_id, default=None):
+        row = self._find(todo_id)
+        if row is None:
+            return default
+        # Detach the removed row into a standalone Todo for the caller, and
+        # give views still held elsewhere their own copy of its fields
+        todo = Todo.from_dict(TodoRow(self, todo_id).to_dict())
+        view = self._views.pop(todo_id, None)
+        if view is not None:
+            view._detach()
+        self._strings.release(self._titles[row])
+        self._strings.release(self._descriptions[row])
+        self._completed[row] = _DELETED
+        if self._rows is not None:
+            del self._rows[todo_id]
+        self._live -= 1
+        if self._live < len(self._ids) // 2:
+            self._compact()
+        return todo
+
+    def _compact(self):
+        """Drop deleted rows once they make up more than half the columns"""
+        keep = [row for row in range(len(self._ids)) if self._completed[row] != _DELETED]
+        self._ids = array('q', (self._ids[row] for row in keep))
+        self._completed = bytearray(self._completed[row] for row in keep)
+        self._titles = array('I', (self._titles[row] for row in keep))
+        self._descriptions = array('I', (self._descriptions[row] for row in keep))
+        if self._rows is not None:
+            self._rows = {todo_id: row for row, todo_id in enumerate(self._ids)}
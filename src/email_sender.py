@@ -2,87 +2,509 @@
 Email configuration for the Todo CLI application
 This file contains the configuration for sending real emails
 """
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
 import os
-from typing import List, Optional
-from dotenv import load_dotenv
-load_dotenv()
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Union
+
+# smtplib, the email.mime classes and python-dotenv are imported on first
+# use, so importing this module costs next to nothing at startup.
+_dotenv_loaded = False
+
+
+def _load_dotenv():
+    """Read .env into the environment, once"""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
+
+
 class EmailConfig:
     """Configuration class for email settings"""
     
     def __init__(self):
+        _load_dotenv()
         # Email server settings - these can be configured by the user
         self.smtp_server = os.getenv('EMAIL_SMTP_SERVER', 'smtp.gmail.com')
         self.smtp_port = int(os.getenv('EMAIL_SMTP_PORT', '587'))
-        self.sender_email = os.getenv('EMAIL_ADDRESS', 'your_email@gmail.com')
+        # "local" targets the in-process SMTP sink (see smtp_sink.py): no
+        # credentials, TLS or network needed
+        self.is_local = self.smtp_server.lower() == 'local'
+        default_sender = 'todo@localhost' if self.is_local else 'your_email@gmail.com'
+        self.sender_email = os.getenv('EMAIL_ADDRESS', default_sender)
         self.sender_password = os.getenv('EMAIL_PASSWORD', 'your_app_password')
-        self.use_tls = os.getenv('EMAIL_USE_TLS', 'True').lower() == 'true'
+        self.use_tls = os.getenv('EMAIL_USE_TLS', 'True').lower() == 'true' and not self.is_local
+        # Largest message to hand the server (Gmail allows 25 MB); bigger
+        # sets of attachments are split across several messages
+        self.max_message_bytes = int(float(os.getenv('EMAIL_MAX_MESSAGE_MB', '20')) * 2 ** 20)
+        # Send all attachments as one zip file
+        self.zip_attachments = os.getenv('EMAIL_ZIP_ATTACHMENTS', 'False').lower() == 'true'
+
+    @property
+    def is_configured(self):
+        """True when real sending is possible: the local sink, or a sender
+        address other than the placeholder"""
+        if self.is_local:
+            return True
+        return bool(self.sender_email and self.sender_email.strip()
+                    and self.sender_email != 'your_email@gmail.com')
+
+
+class _Connection:
+    """An authenticated SMTP session and its usage counters"""
+
+    def __init__(self, server):
+        self.server = server
+        self.last_used = time.monotonic()
+        self.sent = 0
+
+
+class SMTPPool:
+    """Authenticated SMTP connections kept open between sends.
+
+    Up to ``size`` connections are open at once; send() borrows an idle one
+    (logging in only when none is free) and hands it back afterwards. A
+    connection idle for more than ``max_idle`` seconds is checked with NOOP
+    before reuse, and one that has sent ``max_messages`` messages is closed,
+    since many providers cap messages per session. Safe to use from several
+    threads.
+    """
+
+    def __init__(self, config, size=None, max_idle=None, max_messages=None):
+        self.config = config
+        self.size = size or int(os.getenv('EMAIL_POOL_SIZE', '4'))
+        self.max_idle = float(os.getenv('EMAIL_POOL_MAX_IDLE', '60')) if max_idle is None else max_idle
+        self.max_messages = max_messages or int(os.getenv('EMAIL_POOL_MAX_MESSAGES', '100'))
+        self._lock = threading.Lock()
+        self._idle = []
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _connect(self):
+        import smtplib
+        if self.config.is_local:
+            from smtp_sink import LocalSMTP
+            server = LocalSMTP(timeout=30)
+        else:
+            server = smtplib.SMTP(self.config.smtp_server, self.config.smtp_port, timeout=30)
+        try:
+            if self.config.use_tls:
+                server.starttls()  # Enable security
+            server.login(self.config.sender_email, self.config.sender_password)
+        except BaseException:
+            server.close()
+            raise
+        return _Connection(server)
+
+    def _is_alive(self, connection):
+        try:
+            return connection.server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.server.quit()
+        except Exception:
+            connection.server.close()
+
+    def _checkout(self):
+        """An open connection, reused if one is idle (call with a slot held)"""
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect(), False
+            if time.monotonic() - connection.last_used <= self.max_idle or self._is_alive(connection):
+                return connection, True
+            self._discard(connection)
+
+    def _checkin(self, connection):
+        connection.last_used = time.monotonic()
+        if connection.sent >= self.max_messages:
+            self._discard(connection)
+        else:
+            with self._lock:
+                self._idle.append(connection)
+
+    def send(self, from_addr, to_addrs, chunks):
+        """Send one message; raises smtplib errors like sendmail().
+
+        chunks is a callable returning an iterable of byte chunks with CRLF
+        line endings and leading dots already doubled (see message_chunks),
+        which are written straight into the DATA phase. It is called again
+        if the message has to be resent on a fresh connection.
+        """
+        import smtplib
+        with self._slots:
+            connection, reused = self._checkout()
+            while True:
+                try:
+                    _send_data(connection.server, from_addr, to_addrs, chunks())
+                except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                    # The server refused this message; the session is still fine
+                    self._checkin(connection)
+                    raise
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    connection.server.close()
+                    if not reused:
+                        raise
+                    # The server dropped a session we kept open; retry once on a fresh one
+                    connection, reused = self._connect(), False
+                    continue
+                except BaseException:
+                    # Failed part-way through DATA; the session cannot be reused
+                    connection.server.close()
+                    raise
+                connection.sent += 1
+                self._checkin(connection)
+                return
+
+    def close(self):
+        """Log out of every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config):
+    """The shared SMTPPool for config's server and account"""
+    key = (config.smtp_server, config.smtp_port, config.sender_email, config.sender_password, config.use_tls)
+    with _pools_lock:
+        if not _pools:
+            import atexit
+            atexit.register(close_pools)
+        if key not in _pools:
+            _pools[key] = SMTPPool(config)
+        return _pools[key]
+
+
+def close_pools():
+    """Close every shared SMTP connection (also done at interpreter exit)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def _send_data(server, from_addr, to_addrs, chunks):
+    """MAIL/RCPT/DATA with the message body streamed from chunks"""
+    import smtplib
+
+    if isinstance(to_addrs, str):
+        to_addrs = [to_addrs]
+    server.ehlo_or_helo_if_needed()
+    code, reply = server.mail(from_addr)
+    if code != 250:
+        server.rset()
+        raise smtplib.SMTPSenderRefused(code, reply, from_addr)
+    refused = {}
+    for address in to_addrs:
+        code, reply = server.rcpt(address)
+        if code not in (250, 251):
+            refused[address] = (code, reply)
+    if len(refused) == len(to_addrs):
+        server.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+    code, reply = server.docmd("data")
+    if code != 354:
+        server.rset()
+        raise smtplib.SMTPDataError(code, reply)
+    for chunk in chunks:
+        server.send(chunk)
+    server.send(b".\r\n")
+    code, reply = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, reply)
+    return refused
+
+
+# One attachment (or a byte range of one, when it is too big for a single
+# message) as it is named in the message
+Segment = namedtuple("Segment", ["path", "offset", "length", "filename"])
+
+# Raw bytes per 76-column base64 line, and per read while streaming
+_B64_LINE = 57
+_READ_SIZE = _B64_LINE * 1024
+# Allowance for the headers, text body and per-part headers of a message
+_MESSAGE_OVERHEAD = 16 * 1024
+_PART_OVERHEAD = 512
+
+
+def encoded_size(length):
+    """Bytes length raw bytes take as base64 in 76-column CRLF lines"""
+    return -(-length // 3) * 4 + 2 * -(-length // _B64_LINE)
+
+
+def plan_messages(attachments, max_message_bytes=None):
+    """Group attachments into messages that each stay under max_message_bytes.
+
+    Returns a list of Segment lists, one per message (a single empty list
+    when there is nothing to attach). Files are packed in order; a file too
+    big for one message is cut into byte ranges named "<name>.part001",
+    "<name>.part002", ... that join back with cat / copy /b. Nothing is
+    read here, only sized.
+    """
+    paths = [path for path in attachments or [] if os.path.exists(path)]
+    budget = max_message_bytes - _MESSAGE_OVERHEAD if max_message_bytes else None
+    if budget is not None and budget < 64 * 1024:
+        raise ValueError(f"max message size of {max_message_bytes} bytes is too small for attachments")
+
+    messages = [[]]
+    used = 0
+    for path in paths:
+        size = os.path.getsize(path)
+        offset = 0
+        pieces = []
+        while True:
+            if budget is None:
+                length = size
+            else:
+                room = budget - used - _PART_OVERHEAD
+                # Largest whole number of base64 lines that fits in the room left
+                length = min(size - offset, max(0, room // 78 * _B64_LINE))
+                if length < size - offset and length < 64 * 1024 and messages[-1]:
+                    # Too little room to be worth a piece; start a new message
+                    messages.append([])
+                    used = 0
+                    continue
+            pieces.append(len(messages) - 1)
+            messages[-1].append(Segment(path, offset, length, os.path.basename(path)))
+            used += encoded_size(length) + _PART_OVERHEAD
+            offset += length
+            if offset >= size:
+                break
+            messages.append([])
+            used = 0
+        if len(pieces) > 1:
+            # Name the ranges of a split file in order
+            name = os.path.basename(path)
+            number = 0
+            for group in messages[pieces[0]:]:
+                for i, segment in enumerate(group):
+                    if segment.path == path:
+                        number += 1
+                        group[i] = segment._replace(filename=f"{name}.part{number:03d}")
+    return messages
+
+
+def bundle_attachments(attachments, zip_path):
+    """Write the attachments into one zip file (compressed, file by file) and return its path"""
+    import zipfile
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        for file_path in attachments:
+            if os.path.exists(file_path):
+                bundle.write(file_path, arcname=os.path.basename(file_path))
+    return zip_path
+
+
+def _encode_segment(segment):
+    """Base64 lines of one segment, read and encoded a block at a time"""
+    import binascii
+    with open(segment.path, "rb") as attachment:
+        attachment.seek(segment.offset)
+        remaining = segment.length
+        while remaining:
+            block = attachment.read(min(_READ_SIZE, remaining))
+            if not block:
+                raise OSError(f"{segment.path} changed while it was being sent")
+            remaining -= len(block)
+            yield b"".join(binascii.b2a_base64(block[i:i + _B64_LINE], newline=False) + b"\r\n"
+                           for i in range(0, len(block), _B64_LINE))
+
+
+def message_chunks(config, recipient_email, subject, message_body, segments):
+    """The message as byte chunks ready for the DATA phase.
+
+    Headers, text body and part headers come from the email package as a
+    small skeleton; attachment contents are streamed from disk through
+    base64 where the skeleton leaves a placeholder, so a message is never
+    held in memory as a whole.
+    """
+    import re
+    import uuid
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.base import MIMEBase
+
+    msg = MIMEMultipart()
+    msg['From'] = config.sender_email
+    msg['To'] = recipient_email
+    msg['Subject'] = subject
+
+    # Add body to email
+    msg.attach(MIMEText(message_body, 'plain'))
+    token = uuid.uuid4().hex
+    markers = []
+    for i, segment in enumerate(segments):
+        part = MIMEBase('application', 'octet-stream')
+        part['Content-Transfer-Encoding'] = 'base64'
+        part.add_header('Content-Disposition', 'attachment', filename=segment.filename)
+        markers.append(f"ATTACHMENT-{i}-{token}".encode('ascii'))
+        part.set_payload(markers[-1].decode('ascii'))
+        msg.attach(part)
+
+    # SMTP wants CRLF line endings and a doubled leading dot on every line
+    skeleton = re.sub(rb'\r\n|\r|\n', b'\r\n', msg.as_bytes())
+    skeleton = re.sub(rb'(?m)^\.', b'..', skeleton)
+    for marker, segment in zip(markers, segments):
+        head, skeleton = skeleton.split(marker, 1)
+        yield head
+        yield from _encode_segment(segment)
+        skeleton = skeleton[2:]  # The encoded lines already end with CRLF
+    if not skeleton.endswith(b"\r\n"):
+        skeleton += b"\r\n"
+    yield skeleton
+
+
+def prepare_attachments(attachments, config, zip_attachments=None, workdir=None):
+    """The message plan for a set of attachment files (see plan_messages),
+    zipping them into workdir first if asked to"""
+    if zip_attachments is None:
+        zip_attachments = config.zip_attachments
+    if zip_attachments and attachments:
+        attachments = [bundle_attachments(attachments, os.path.join(workdir, "todo_reports.zip"))]
+    return plan_messages(attachments, config.max_message_bytes)
+
+
+def recipient_address(recipient):
+    """The address of a recipient given as a string or a field dict"""
+    return recipient if isinstance(recipient, str) else recipient["email"]
+
+
+def send_templated(recipient, subject, message_body, plan, config, pool=None):
+    """Send one email built from string.Template subject/body texts.
+
+    recipient is an address or a dict with an "email" key; $email, $name
+    and the dict's fields are substituted. plan comes from
+    prepare_attachments(); when it holds several messages each subject
+    gets a "(part i/n)" suffix. Raises on failure.
+    """
+    from string import Template
+
+    fields = {"email": recipient} if isinstance(recipient, str) else dict(recipient)
+    fields.setdefault("name", fields["email"].split("@")[0])
+    _send_plan(fields["email"], Template(subject).safe_substitute(fields),
+               Template(message_body).safe_substitute(fields), plan, config, pool)
+
+
+def _send_plan(recipient_email, subject, message_body, plan, config, pool=None):
+    """Send the messages of a plan; when there are several, each subject
+    gets a "(part i/n)" suffix"""
+    pool = pool or get_pool(config)
+    if any(segment.filename.endswith(".part001") for segments in plan for segment in segments):
+        message_body += ("\n\nLarge attachments were split into numbered parts across these messages. "
+                         "Join them in order, e.g. cat report.pdf.part* > report.pdf")
+    for number, segments in enumerate(plan, start=1):
+        part_subject = f"{subject} (part {number}/{len(plan)})" if len(plan) > 1 else subject
+        pool.send(config.sender_email, recipient_email,
+                  lambda segments=segments, part_subject=part_subject: message_chunks(
+                      config, recipient_email, part_subject, message_body, segments))
+
 
 def send_real_email(
     recipient_email: str,
     subject: str,
     message_body: str,
     attachments: List[str] = None,
-    config: EmailConfig = None
+    config: EmailConfig = None,
+    zip_attachments: Optional[bool] = None
 ) -> bool:
     """
     Send a real email with optional attachments
-    
+
+    The message goes out over the shared connection pool for config, so
+    consecutive sends skip the connect/STARTTLS/login round-trips.
+    Attachments are streamed from disk into the connection; if they exceed
+    config.max_message_bytes they are spread over several messages.
+
     Args:
         recipient_email: Email address of the recipient
         subject: Subject of the email
         message_body: Body content of the email
         attachments: List of file paths to attach
         config: Email configuration object
-    
+        zip_attachments: Send the attachments as one zip (default: config.zip_attachments)
+
     Returns:
         True if email was sent successfully, False otherwise
     """
+    import tempfile
     if config is None:
         config = EmailConfig()
-    
+
     try:
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = config.sender_email
-        msg['To'] = recipient_email
-        msg['Subject'] = subject
-        
-        # Add body to email
-        msg.attach(MIMEText(message_body, 'plain'))
-        
-        # Add attachments if any
-        if attachments:
-            for file_path in attachments:
-                if os.path.exists(file_path):
-                    with open(file_path, "rb") as attachment:
-                        part = MIMEBase('application', 'octet-stream')
-                        part.set_payload(attachment.read())
-                    
-                    encoders.encode_base64(part)
-                    part.add_header(
-                        'Content-Disposition',
-                        f'attachment; filename= {os.path.basename(file_path)}'
-                    )
-                    
-                    msg.attach(part)
-        
-        # Create SMTP session
-        server = smtplib.SMTP(config.smtp_server, config.smtp_port)
-        server.starttls() if config.use_tls else None  # Enable security
-        server.login(config.sender_email, config.sender_password)
-        
-        # Send email
-        text = msg.as_string()
-        server.sendmail(config.sender_email, recipient_email, text)
-        server.quit()
-        
+        with tempfile.TemporaryDirectory() as workdir:
+            plan = prepare_attachments(attachments, config, zip_attachments, workdir)
+            _send_plan(recipient_email, subject, message_body, plan, config)
         return True
-        
+
     except Exception as e:
         print(f"Error sending email: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+
+def send_bulk(
+    recipients: List[Union[str, Dict[str, str]]],
+    subject: str,
+    message_body: str,
+    attachments: List[str] = None,
+    config: EmailConfig = None,
+    max_workers: Optional[int] = None,
+    zip_attachments: Optional[bool] = None
+) -> Dict[str, bool]:
+    """
+    Send one email (and one set of attachments) to many recipients
+
+    Each recipient gets their own message. subject and message_body are
+    string.Template texts: $email, $name and any other field of a
+    recipient dict are filled in per recipient (unknown placeholders are
+    left as they are). Attachments are zipped (if asked) and split into
+    messages once, then streamed from disk for each recipient; the
+    messages are sent from up to max_workers threads (default: the pool
+    size) over pooled connections.
+
+    Args:
+        recipients: Addresses, or dicts with an "email" key plus template fields
+        subject: Subject template
+        message_body: Body template
+        attachments: List of file paths to attach to every message
+        config: Email configuration object
+        max_workers: Number of sending threads
+        zip_attachments: Send the attachments as one zip (default: config.zip_attachments)
+
+    Returns:
+        {address: True if sent, else False}, in recipient order
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import tempfile
+
+    if config is None:
+        config = EmailConfig()
+    pool = get_pool(config)
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            plan = prepare_attachments(attachments, config, zip_attachments, workdir)
+        except Exception as e:
+            print(f"Error reading attachments: {str(e)}")
+            return {recipient_address(recipient): False for recipient in recipients}
+
+        def send_one(recipient):
+            address = recipient_address(recipient)
+            try:
+                send_templated(recipient, subject, message_body, plan, config, pool)
+                return address, True
+            except Exception as e:
+                print(f"Error sending email to {address}: {str(e)}")
+                return address, False
+
+        with ThreadPoolExecutor(max_workers=max_workers or pool.size) as executor:
+            return dict(executor.map(send_one, recipients))
@@ -0,0 +1,105 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Advisory inter-process lock on a sidecar file.
+
+    Re-entrant within a process: nested ``with lock:`` blocks in the same
+    thread only take the OS lock once, and other threads wait on an
+    in-process lock first.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if fcntl:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                    else:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                except BaseException:
+                    os.close(fd)
+                    raise
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class StorageBusyError(RuntimeError):
+    """The data file is claimed in a way that rules out opening it here"""
+
+
+class UsageClaim:
+    """Non-blocking claim on a sidecar file, held while a storage is open.
+
+    Every storage backend holds a shared claim, so any number of processes
+    can use the data file together. Write-behind storage makes its claim
+    exclusive: its changes sit in memory for a while, invisible to other
+    processes, so it needs the data file to itself. Conflicting claims raise
+    StorageBusyError instead of waiting. Not enforced on Windows, which has
+    no shared locks.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        if fcntl:
+            self._file = open(path, 'ab')
+            self._flock(fcntl.LOCK_SH, f"{path} is in use by a process that defers its writes "
+                                        f"(TODO_DURABILITY=debounce or exit)")
+
+    def _flock(self, mode, message):
+        try:
+            fcntl.flock(self._file.fileno(), mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.release()
+            raise StorageBusyError(message) from None
+
+    def make_exclusive(self):
+        """Upgrade to an exclusive claim; raises StorageBusyError if anyone else holds one"""
+        if self._file is not None:
+            self._flock(fcntl.LOCK_EX, f"{self.path} is in use by another process; deferred writes "
+                                       f"(TODO_DURABILITY=debounce or exit) need the data file to themselves")
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
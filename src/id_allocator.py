@@ -0,0 +1,54 @@
+import threading
+
+
+class IdAllocator:
+    """Hands out increasing todo ids; safe to call from many threads.
+
+    With ``block_size`` > 1 each thread reserves a block of ids under the lock
+    and then allocates from it without locking. Ids stay unique but are no
+    longer strictly increasing in insertion order across threads.
+    """
+
+    def __init__(self, next_id=1, block_size=1):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = next_id
+        # Bumped whenever the counter jumps forward, so blocks reserved before
+        # the jump (which may overlap ids seen elsewhere) are abandoned
+        self._generation = 0
+        self._local = threading.local()
+
+    def allocate(self):
+        """Return a new unique id"""
+        if self.block_size <= 1:
+            with self._lock:
+                todo_id = self._next
+                self._next += 1
+                return todo_id
+
+        block = getattr(self._local, "block", None)
+        if block is None or block[0] >= block[1] or block[2] != self._generation:
+            with self._lock:
+                block = [self._next, self._next + self.block_size, self._generation]
+                self._next += self.block_size
+            self._local.block = block
+        todo_id = block[0]
+        block[0] += 1
+        return todo_id
+
+    def advance_past(self, todo_id):
+        """Make sure ids handed out from now on are greater than todo_id"""
+        with self._lock:
+            if todo_id >= self._next:
+                self._next = todo_id + 1
+                self._generation += 1
+
+    def reset(self, next_id):
+        """Restart allocation at next_id (used after a full reload)"""
+        with self._lock:
+            self._next = next_id
+            self._generation += 1
+
+    @property
+    def next_id(self):
+        return self._next
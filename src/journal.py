@@ -0,0 +1,108 @@
+import json
+import os
+import time
+
+import metrics
+
+
+class TodoJournal:
+    """Append-only log of todo mutations kept next to the JSON snapshot.
+
+    Each line is a small JSON record: ``{"op": "put", "todo": {...}}`` stores the
+    full state of one todo and ``{"op": "delete", "id": N}`` removes it. Both are
+    idempotent, so replaying the log over a snapshot that already contains some
+    of the changes (e.g. after a crash during compaction) is always safe.
+    """
+
+    def __init__(self, path, max_records=1000, max_bytes=1024 * 1024):
+        self.path = path
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.record_count = 0
+        self.size = os.path.getsize(path) if os.path.exists(path) else 0
+
+    def append(self, records):
+        """Append a list of mutation records to the log in a single write.
+
+        Callers hold the storage lock, so no other append is in progress and
+        a last line without a newline is left over from a crash; it is cut off
+        first, or the new records would be glued onto it and lost on replay.
+        """
+        if not records:
+            return
+        data = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode('utf-8')
+        start = time.perf_counter()
+        with open(self.path, 'a+b') as f:
+            end = self._drop_torn_tail(f)
+            f.write(data)
+        metrics.io("write", len(data), time.perf_counter() - start)
+        self.record_count += len(records)
+        self.size = min(self.size, end) + len(data)
+
+    def _drop_torn_tail(self, f):
+        """Truncate f after its last complete line and return the new size"""
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos:
+            step = min(pos, 64 * 1024)
+            f.seek(pos - step)
+            block = f.read(step)
+            if pos == end and block.endswith(b"\n"):
+                return end
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                pos = pos - step + newline + 1
+                break
+            pos -= step
+        f.truncate(pos)
+        return pos
+
+    def replay(self):
+        """Yield the records currently stored in the log, oldest first"""
+        if not os.path.exists(self.path):
+            return
+        count = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn line from an interrupted append. The next append
+                    # cuts it off; logs written before that was done may have
+                    # intact records after it, so keep going.
+                    continue
+                count += 1
+                yield record
+        self.record_count = count
+        self.size = os.path.getsize(self.path)
+        metrics.io("read", self.size)
+
+    def read_new(self):
+        """Yield records appended (e.g. by another process) since our last read or write"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.size)
+            data = f.read()
+        metrics.io("read", len(data))
+        # Leave a partially written last line for the next call
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                self.record_count += 1
+                yield json.loads(line)
+        self.size += end
+
+    def needs_compaction(self):
+        """Check whether the log has grown past its record or size threshold"""
+        return self.record_count >= self.max_records or self.size >= self.max_bytes
+
+    def clear(self):
+        """Remove the log once its contents are folded into the snapshot"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.record_count = 0
+        self.size = 0
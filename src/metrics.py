@@ -0,0 +1,295 @@
+"""
+Timing and I/O metrics for the Todo application.
+
+Off by default. enable() (from TODO_METRICS_FILE=path or --metrics=path)
+wraps every TodoApp menu action, every public TodoManager method and the
+storage backends' load/apply/save methods in timers, and turns on the
+observe()/io() calls placed at the file reads and writes and in the report
+builder. Timings go into fixed-bucket histograms and byte counts into
+counters, all kept in memory; on exit they are written to the metrics file,
+as Prometheus text if it ends in .prom or .txt, otherwise as JSON.
+
+Bytes read and written are also attributed to the innermost timed
+operation, so todo_io_bytes_total{operation="add_todo"} shows what one
+kind of change costs on disk. While disabled, observe() and io() return at
+once and nothing is wrapped.
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    "todo_app_action_seconds": "Time spent in each TodoApp menu action, including prompts",
+    "todo_manager_seconds": "Time spent in TodoManager methods",
+    "todo_storage_seconds": "Time spent in storage backend methods",
+    "todo_io_seconds": "Time spent reading or writing data files",
+    "todo_io_bytes_total": "Bytes read from or written to data files",
+    "todo_console_render_seconds": "Time spent rendering Rich output to the terminal",
+    "todo_report_seconds": "Time to produce (or reuse) one report format",
+    "todo_report_render_seconds": "Time spent in a report writer in this process",
+}
+
+APP_ACTIONS = (
+    "add_task", "view_tasks", "update_task", "delete_task", "toggle_complete_task", "print_final_record",
+    "export_to_excel", "send_email", "search_tasks", "email_queue",
+)
+MANAGER_METHODS = (
+    "save_to_file", "load_from_file", "compact", "close", "refresh", "search", "add_many", "delete_many",
+    "set_completed_many", "add_todo", "get_all_todos", "count", "get_page", "find_todo_by_id", "update_todo",
+    "delete_todo", "toggle_complete",
+)
+STORAGE_METHODS = ("load", "apply", "save_all", "compact", "reload_changes", "flush", "close")
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_local = threading.local()
+
+
+class Histogram:
+    """Counts of observations per bucket, plus their count, sum, min and max"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        index = 0
+        while index < len(BUCKETS) and value > BUCKETS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (max for the last bucket)"""
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return BUCKETS[index] if index < len(BUCKETS) else self.max
+        return self.max
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def enabled():
+    return _enabled
+
+
+def observe(name, seconds, **labels):
+    """Add one duration to the histogram name{labels}"""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+def add(name, amount, **labels):
+    """Increase the counter name{labels}"""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def _operations():
+    stack = getattr(_local, "operations", None)
+    if stack is None:
+        stack = _local.operations = []
+    return stack
+
+
+def current_operation():
+    """Name of the innermost timed operation in this thread"""
+    stack = _operations()
+    return stack[-1] if stack else "other"
+
+
+def io(direction, nbytes, seconds=None):
+    """Record a file read or write ("read"/"write") of nbytes"""
+    if not _enabled:
+        return
+    add("todo_io_bytes_total", nbytes, direction=direction, operation=current_operation())
+    if seconds is not None:
+        observe("todo_io_seconds", seconds, direction=direction)
+
+
+class timer:
+    """Context manager timing a block into name{labels}; operation (if given)
+    becomes the current operation for io() attribution inside the block"""
+
+    __slots__ = ("name", "labels", "operation", "start")
+
+    def __init__(self, name, operation=None, **labels):
+        self.name = name
+        self.labels = labels
+        self.operation = operation
+
+    def __enter__(self):
+        if self.operation is not None:
+            _operations().append(self.operation)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        if self.operation is not None:
+            _operations().pop()
+        return False
+
+
+def _wrap(func, name, operation, labels):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        with timer(name, operation, **labels):
+            return func(*args, **kwargs)
+    timed._metrics_wrapped = True
+    return timed
+
+
+def instrument(cls, name, methods, label, operation=True, **labels):
+    """Time the given methods of cls (inherited ones too, wrapped on cls so each
+    class keeps its own labels) into name{label=method, **labels}; with
+    operation, each method is also the current operation while it runs"""
+    for method in methods:
+        func = getattr(cls, method, None)
+        if func is None or getattr(func, "_metrics_wrapped", False):
+            continue
+        setattr(cls, method, _wrap(func, name, method if operation else None, dict(labels, **{label: method})))
+
+
+def instrument_console(console):
+    """Time console.print calls, labelled with the action that made them"""
+    print_ = console.print
+    if getattr(print_, "_metrics_wrapped", False):
+        return
+
+    @functools.wraps(print_)
+    def timed_print(*args, **kwargs):
+        with timer("todo_console_render_seconds", action=current_operation()):
+            return print_(*args, **kwargs)
+    timed_print._metrics_wrapped = True
+    console.print = timed_print
+
+
+def enable(path=None):
+    """Start collecting, and write the metrics to path at exit (if given)"""
+    global _enabled
+    from todo_manager import TodoManager
+    from storage import JsonFileStorage, SqliteStorage
+    from write_behind import WriteBehindStorage
+
+    instrument(TodoManager, "todo_manager_seconds", MANAGER_METHODS, "method")
+    # Storage I/O stays attributed to the TodoManager method that caused it
+    for cls in (JsonFileStorage, SqliteStorage, WriteBehindStorage):
+        instrument(cls, "todo_storage_seconds", STORAGE_METHODS, "method", False, backend=cls.__name__)
+    try:
+        from binary_snapshot import BinarySnapshotStorage
+        instrument(BinarySnapshotStorage, "todo_storage_seconds", STORAGE_METHODS, "method", False,
+                   backend="BinarySnapshotStorage")
+    except ImportError:
+        pass
+    _enabled = True
+    if path:
+        import atexit
+        atexit.register(dump, path)
+
+
+def instrument_app(app_class):
+    """Time TodoApp menu actions (done by app.py, which enable() cannot import)"""
+    instrument(app_class, "todo_app_action_seconds", APP_ACTIONS, "action")
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def snapshot():
+    """All metrics as plain data: {name: [{"labels": ..., ...}, ...]}"""
+    data = {}
+    with _lock:
+        for (name, labels), histogram in sorted(_histograms.items()):
+            data.setdefault(name, []).append({
+                "labels": dict(labels),
+                "count": histogram.count,
+                "sum": histogram.sum,
+                "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                "min": histogram.min,
+                "max": histogram.max,
+                "p50": histogram.quantile(0.5),
+                "p99": histogram.quantile(0.99),
+                "buckets": {str(bound): count for bound, count in zip(BUCKETS + ("+Inf",), histogram.buckets)},
+            })
+        for (name, labels), value in sorted(_counters.items()):
+            data.setdefault(name, []).append({"labels": dict(labels), "value": value})
+    return data
+
+
+def _label_text(labels, **extra):
+    labels = dict(labels, **extra)
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+def to_prometheus():
+    """The metrics in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+    seen = set()
+    for (name, labels), histogram in histograms:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), histogram.buckets):
+            cumulative += count
+            lines.append(f"{name}_bucket{_label_text(dict(labels), le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_label_text(dict(labels))} {histogram.sum}")
+        lines.append(f"{name}_count{_label_text(dict(labels))} {histogram.count}")
+    for (name, labels), value in counters:
+        if name not in seen:
+            seen.add(name)
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_label_text(dict(labels))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def dump(path):
+    """Write the metrics to path: Prometheus text for .prom/.txt, otherwise JSON"""
+    try:
+        if os.path.splitext(path)[1].lower() in (".prom", ".txt"):
+            text = to_prometheus()
+        else:
+            text = json.dumps({"created": time.time(), "metrics": snapshot()}, indent=2)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    except Exception as e:
+        print(f"Error writing metrics: {e}")
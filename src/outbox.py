@@ -0,0 +1,367 @@
+"""
+A durable outbox for email, delivered in the background.
+
+Outbox.enqueue() writes each message as a JSON file under the outbox
+directory (TODO_OUTBOX_DIR, default src/outbox) and copies its attachments
+next to it, so a queued message survives restarts and report pruning.
+Message files move between state directories:
+
+    pending/   waiting for delivery (or for the next retry)
+    inflight/  claimed by a worker (file name carries the worker's pid)
+    sent/      delivered to every recipient
+    failed/    gave up: retries exhausted or recipients permanently refused
+
+Attachment copies (attachments/<id>/) are removed when a message is sent,
+and for failed messages once they are retried with nobody left to send to
+or pruned (only the newest TODO_OUTBOX_KEEP_FAILED are kept).
+
+OutboxWorker is a daemon thread that delivers due messages over the pooled
+SMTP connections of email_sender. Temporary failures are retried with
+exponential backoff (EMAIL_RETRY_BASE seconds, doubling up to
+EMAIL_RETRY_MAX, at most EMAIL_MAX_ATTEMPTS attempts); a token bucket
+(EMAIL_RATE_PER_MINUTE, bursts of EMAIL_BURST) keeps the send rate under
+provider throttling.
+"""
+import json
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from storage import atomic_write_bytes
+
+OUTBOX_DIR = os.getenv('TODO_OUTBOX_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), "outbox"))
+# Delivered messages kept for the status view
+OUTBOX_KEEP_SENT = int(os.getenv('TODO_OUTBOX_KEEP_SENT', '100'))
+# Failed messages (and their attachments) kept for retrying
+OUTBOX_KEEP_FAILED = int(os.getenv('TODO_OUTBOX_KEEP_FAILED', '100'))
+STATES = ("pending", "inflight", "sent", "failed")
+
+EMAIL_RATE_PER_MINUTE = float(os.getenv('EMAIL_RATE_PER_MINUTE', '600'))
+EMAIL_BURST = int(os.getenv('EMAIL_BURST', '50'))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '8'))
+EMAIL_RETRY_BASE = float(os.getenv('EMAIL_RETRY_BASE', '30'))
+EMAIL_RETRY_MAX = float(os.getenv('EMAIL_RETRY_MAX', '3600'))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Outbox:
+    """Queued messages on disk, one JSON file per message"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or OUTBOX_DIR
+
+    def _state_dir(self, state):
+        return os.path.join(self.directory, state)
+
+    def _path(self, state, message_id):
+        return os.path.join(self._state_dir(state), f"{message_id}.json")
+
+    def _write(self, path, record):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write_bytes(path, json.dumps(record, ensure_ascii=False).encode('utf-8'))
+
+    def _read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _names(self, state):
+        try:
+            return sorted(name for name in os.listdir(self._state_dir(state)) if name.endswith(".json"))
+        except FileNotFoundError:
+            return []
+
+    def enqueue(self, recipients, subject, message_body, attachments=None, zip_attachments=False):
+        """Queue one message for recipients (addresses or field dicts) and return its id.
+
+        With zip_attachments the attachments are stored (and sent) as one zip.
+        Raises FileNotFoundError, and queues nothing, if an attachment is missing.
+        """
+        missing = [file_path for file_path in attachments or [] if not os.path.isfile(file_path)]
+        if missing:
+            raise FileNotFoundError(f"attachment not found: {', '.join(missing)}")
+        message_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        # Copy the attachments so pruning the reports cannot pull them away
+        copies = []
+        if attachments:
+            attachment_dir = os.path.join(self.directory, "attachments", message_id)
+            os.makedirs(attachment_dir, exist_ok=True)
+            try:
+                if zip_attachments:
+                    from email_sender import bundle_attachments
+                    copies.append(bundle_attachments(attachments, os.path.join(attachment_dir, "todo_reports.zip")))
+                    attachments = []
+                for file_path in attachments:
+                    copy = os.path.join(attachment_dir, os.path.basename(file_path))
+                    shutil.copyfile(file_path, copy)
+                    copies.append(copy)
+            except BaseException:
+                self._remove_attachments(message_id)
+                raise
+        now = time.time()
+        self._write(self._path("pending", message_id), {
+            "id": message_id,
+            "created": now,
+            "subject": subject,
+            "body": message_body,
+            "attachments": copies,
+            "recipients": list(recipients),
+            "sent": [],
+            "failed": {},
+            "undelivered": [],
+            "attempts": 0,
+            "next_attempt": now,
+            "last_error": None,
+        })
+        return message_id
+
+    def counts(self):
+        """Number of messages in each state"""
+        return {state: len(self._names(state)) for state in STATES}
+
+    def messages(self, state, limit=None):
+        """Records in a state, oldest first"""
+        records = []
+        for name in self._names(state)[:limit]:
+            try:
+                records.append(self._read(os.path.join(self._state_dir(state), name)))
+            except (OSError, ValueError):
+                continue  # Moved by a worker while we looked
+        return records
+
+    def next_due(self):
+        """Earliest next_attempt of the pending messages, or None"""
+        return min((record["next_attempt"] for record in self.messages("pending")), default=None)
+
+    def claim(self, message_id):
+        """Move a pending message to inflight for this process; None if another worker got it"""
+        inflight = os.path.join(self._state_dir("inflight"), f"{message_id}.{os.getpid()}.json")
+        os.makedirs(self._state_dir("inflight"), exist_ok=True)
+        try:
+            os.replace(self._path("pending", message_id), inflight)
+        except FileNotFoundError:
+            return None
+        return self._read(inflight)
+
+    def release(self, record, state):
+        """Store a claimed message in its new state ("pending", "sent" or "failed")"""
+        self._write(self._path(state, record["id"]), record)
+        os.remove(os.path.join(self._state_dir("inflight"), f"{record['id']}.{os.getpid()}.json"))
+        if state == "sent":
+            self._remove_attachments(record["id"])
+            self._prune("sent", OUTBOX_KEEP_SENT)
+        elif state == "failed":
+            self._prune("failed", OUTBOX_KEEP_FAILED)
+
+    def _remove_attachments(self, message_id):
+        shutil.rmtree(os.path.join(self.directory, "attachments", message_id), ignore_errors=True)
+
+    def _prune(self, state, keep):
+        """Delete the oldest messages in a state beyond keep, with any attachments"""
+        names = self._names(state)
+        for name in names[:max(0, len(names) - keep)]:
+            try:
+                os.remove(os.path.join(self._state_dir(state), name))
+            except FileNotFoundError:
+                continue
+            self._remove_attachments(name[:-len(".json")])
+
+    def recover(self):
+        """Return messages claimed by workers that died back to pending"""
+        recovered = 0
+        for name in self._names("inflight"):
+            message_id, _, pid = name[:-len(".json")].rpartition(".")
+            if pid.isdigit() and _pid_alive(int(pid)) and int(pid) != os.getpid():
+                continue
+            try:
+                os.replace(os.path.join(self._state_dir("inflight"), name), self._path("pending", message_id))
+                recovered += 1
+            except FileNotFoundError:
+                pass
+        return recovered
+
+    def retry_failed(self):
+        """Queue the undelivered recipients of failed messages again"""
+        retried = 0
+        for record in self.messages("failed"):
+            record["recipients"] = record["undelivered"]
+            record["undelivered"] = []
+            record["failed"] = {}
+            record["attempts"] = 0
+            record["next_attempt"] = time.time()
+            if record["recipients"]:
+                self._write(self._path("pending", record["id"]), record)
+            os.remove(self._path("failed", record["id"]))
+            if not record["recipients"]:
+                self._remove_attachments(record["id"])
+            retried += 1
+        return retried
+
+
+def _address(recipient):
+    return recipient if isinstance(recipient, str) else recipient["email"]
+
+
+class TokenBucket:
+    """Allow ``rate`` events per second on average, in bursts of up to ``capacity``"""
+
+    def __init__(self, rate, capacity):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop=None):
+        """Take one token, waiting for it if needed; False if stop was set meanwhile"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(wait):
+                return False
+
+
+def _is_permanent(error):
+    """True for errors retrying cannot fix, like a refused recipient"""
+    import smtplib
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        # 4xx refusals (greylisting, mailbox busy) are worth retrying
+        return all(500 <= code < 600 for code, _ in error.recipients.values())
+    return (isinstance(error, smtplib.SMTPResponseException)
+            and not isinstance(error, smtplib.SMTPAuthenticationError)
+            and 500 <= error.smtp_code < 600)
+
+
+class OutboxWorker(threading.Thread):
+    """Background thread that delivers the outbox's due messages"""
+
+    def __init__(self, outbox=None, config=None, rate_per_minute=None, burst=None):
+        super().__init__(name="outbox-worker", daemon=True)
+        self.outbox = outbox or Outbox()
+        self.config = config
+        rate = EMAIL_RATE_PER_MINUTE if rate_per_minute is None else rate_per_minute
+        if rate <= 0:
+            raise ValueError(f"EMAIL_RATE_PER_MINUTE must be positive, got {rate}")
+        self.bucket = TokenBucket(rate / 60, EMAIL_BURST if burst is None else burst)
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self):
+        """Look at the outbox now, e.g. after enqueueing a message"""
+        self._wake.set()
+
+    def stop(self, timeout=5):
+        """Stop after the message being sent; queued messages stay on disk"""
+        self._stopping.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        self.outbox.recover()
+        while not self._stopping.is_set():
+            try:
+                self.process_due()
+                next_due = self.outbox.next_due()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                next_due = None
+            # Sleep until the next retry is due (re-checking at least every minute)
+            timeout = 60 if next_due is None else min(60, max(0.0, next_due - time.time()))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def process_due(self):
+        """Deliver every pending message that is due; returns how many were attempted"""
+        attempted = 0
+        now = time.time()
+        for record in self.outbox.messages("pending"):
+            if self._stopping.is_set():
+                break
+            if record["next_attempt"] <= now:
+                claimed = self.outbox.claim(record["id"])
+                if claimed:
+                    self._deliver(claimed)
+                    attempted += 1
+        return attempted
+
+    def _deliver(self, record):
+        from concurrent.futures import ThreadPoolExecutor
+        import email_sender
+
+        config = self.config or email_sender.EmailConfig()
+        pool = email_sender.get_pool(config)
+
+        def send_one(recipient):
+            if not self.bucket.acquire(self._stopping):
+                return recipient, None  # Stopping; keep it queued
+            try:
+                email_sender.send_templated(recipient, record["subject"], record["body"], plan, config, pool)
+                return recipient, True
+            except Exception as e:
+                return recipient, e
+
+        try:
+            plan = email_sender.plan_messages(record["attachments"], config.max_message_bytes)
+            with ThreadPoolExecutor(max_workers=pool.size) as executor:
+                results = list(executor.map(send_one, record["recipients"]))
+        except Exception as e:
+            results = [(recipient, e) for recipient in record["recipients"]]
+
+        remaining = []
+        undelivered = record["undelivered"]
+        for recipient, outcome in results:
+            if outcome is True:
+                record["sent"].append(_address(recipient))
+            elif outcome is None:
+                remaining.append(recipient)
+            else:
+                record["last_error"] = f"{_address(recipient)}: {type(outcome).__name__}: {outcome}"
+                if _is_permanent(outcome):
+                    record["failed"][_address(recipient)] = str(outcome)
+                    undelivered.append(recipient)
+                else:
+                    remaining.append(recipient)
+
+        if any(outcome not in (True, None) for _, outcome in results):
+            record["attempts"] += 1
+        record["recipients"] = remaining
+        record["undelivered"] = undelivered
+        if not remaining:
+            state = "failed" if record["failed"] else "sent"
+        elif record["attempts"] >= EMAIL_MAX_ATTEMPTS:
+            for recipient in remaining:
+                record["failed"][_address(recipient)] = record["last_error"]
+            record["undelivered"] = undelivered + remaining
+            record["recipients"] = []
+            state = "failed"
+        else:
+            if record["attempts"]:
+                # Exponential backoff with jitter, so a throttled burst spreads out
+                delay = min(EMAIL_RETRY_BASE * 2 ** (record["attempts"] - 1), EMAIL_RETRY_MAX)
+                record["next_attempt"] = time.time() + delay * random.uniform(0.5, 1.0)
+            state = "pending"
+        self.outbox.release(record, state)
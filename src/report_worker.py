@@ -0,0 +1,62 @@
+"""
+A long-lived, pre-warmed process for rendering reports.
+
+Importing reportlab and openpyxl and building their styles costs far more
+than rendering a small report. ReportWorker keeps a process pool alive
+between reports: each worker process imports both libraries and builds the
+cached style objects (reports.pdf_styles() / excel_styles()) once, when it
+starts, and then takes render jobs over the pool's pipe. Only the serialized
+task snapshot crosses the pipe, so the interactive process itself never
+loads the report libraries.
+"""
+import os
+
+import reports
+
+
+def _warm_up():
+    """Pool initializer: load the report libraries and styles up front"""
+    reports.pdf_styles()
+    reports.excel_styles()
+    # The rest of what the writers import, so the first job starts rendering at once
+    import importlib
+    for module in ("reportlab.platypus", "reportlab.lib.pagesizes", "openpyxl.cell", "openpyxl.utils"):
+        importlib.import_module(module)
+
+
+class ReportWorker:
+    """Render jobs for reports.build_reports(worker=...) in warm processes"""
+
+    def __init__(self, max_workers=None):
+        # One process per format at most; more would only sit idle
+        if max_workers is None:
+            max_workers = min(len(reports.WRITERS), os.cpu_count() or 1)
+        self.max_workers = max(1, max_workers)
+        self._pool = None
+
+    @property
+    def running(self):
+        return self._pool is not None
+
+    def start(self):
+        """Start the worker processes (if needed) and begin warming them up"""
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_warm_up,
+                                             mp_context=reports._pool_context())
+            # Processes are only spawned for work, so give each one a no-op
+            # job; warm-up runs in the background while the user carries on
+            for _ in range(self.max_workers):
+                self._pool.submit(os.getpid)
+        return self
+
+    def submit(self, snapshot, fmt, path, title=None):
+        """Queue one render job and return its Future (resolves to path)"""
+        self.start()
+        return self._pool.submit(reports._render_snapshot, snapshot, fmt, path, title)
+
+    def close(self):
+        """Stop the worker processes; a later submit() starts fresh ones"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
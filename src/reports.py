@@ -0,0 +1,524 @@
+"""
+Report builders for the Todo application.
+
+Each writer takes a list of todos and a target path, so the interactive
+menu and the headless command mode produce identical files. reportlab and
+openpyxl are imported inside the writers that need them.
+
+build_reports() is the shared entry point. It names each file after a hash
+of the task data (plus format and title), so asking again for a report of
+unchanged tasks reuses the existing file instead of rendering a new one.
+Formats that do need rendering are produced in parallel worker processes,
+or in the warm processes of a report_worker.ReportWorker when one is passed.
+The style objects of both writers are built once per process and cached.
+Old files are pruned by a retention policy (TODO_REPORT_KEEP files,
+TODO_REPORT_MAX_AGE_DAYS days).
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import metrics
+
+# Bump when the writers change, so cached files made by older code are not reused
+REPORT_VERSION = 4
+
+# Generated reports live in src/reports unless TODO_REPORT_DIR says otherwise
+REPORT_DIR = os.getenv('TODO_REPORT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), "reports"))
+REPORT_KEEP = int(os.getenv('TODO_REPORT_KEEP', '20'))
+REPORT_MAX_AGE_DAYS = float(os.getenv('TODO_REPORT_MAX_AGE_DAYS', '30'))
+# Render several missing formats at once in worker processes
+REPORT_PARALLEL = os.getenv('TODO_REPORT_PARALLEL', 'True').lower() == 'true'
+
+# PDF task table layout: header and one-line row heights in points (rows
+# with longer text grow to fit) and each column's share of the page width
+PDF_HEADER_HEIGHT = 24
+PDF_ROW_HEIGHT = 18
+PDF_COLUMN_SHARES = (0.08, 0.32, 0.44, 0.16)
+
+# Rows per worksheet allowed by Excel
+EXCEL_MAX_ROWS = 1048576
+
+# <prefix>_<16 hex digits>.<format>; anything else in the directory is left alone
+_CACHED_NAME = re.compile(r"^\w+_[0-9a-f]{16}\.(txt|pdf|xlsx)$")
+
+
+def summary_counts(tasks):
+    """Return (total, completed, incomplete) for a list of todos"""
+    completed_count = sum(1 for task in tasks if task.completed)
+    return len(tasks), completed_count, len(tasks) - completed_count
+
+
+def write_text_report(tasks, path):
+    """Write the plain-text final record"""
+    total, completed_count, incomplete_count = summary_counts(tasks)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("Final Todo Record\n")
+        f.write("="*50 + "\n")
+        f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+
+        f.write("Summary:\n")
+        f.write(f"Total Tasks: {total}\n")
+        f.write(f"Completed Tasks: {completed_count}\n")
+        f.write(f"Incomplete Tasks: {incomplete_count}\n\n")
+
+        f.write("Task Details:\n")
+        f.write("-" * 50 + "\n")
+        for task in tasks:
+            status = "Complete" if task.completed else "Incomplete"
+            f.write(f"ID: {task.id}\n")
+            f.write(f"Title: {task.title}\n")
+            f.write(f"Description: {task.description}\n")
+            f.write(f"Status: {status}\n")
+            f.write("-" * 30 + "\n")
+    return path
+
+
+class _PendingRows:
+    """Placeholder for a slice of tasks in a PDF flowable list"""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+    def getKeepWithNext(self):
+        # Asked by the layout engine when it looks ahead at the next flowable
+        return False
+
+
+@lru_cache(maxsize=None)
+def pdf_styles():
+    """Paragraph and table styles for the PDF report, built once per process"""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    from reportlab.lib import colors
+
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            spaceAfter=30,
+            alignment=1  # Center alignment
+        ),
+        "date": ParagraphStyle(
+            'CustomDate',
+            parent=styles['Normal'],
+            fontSize=12,
+            spaceAfter=20,
+            alignment=1  # Center alignment
+        ),
+        "heading": styles['Heading2'],
+        # Task table cells too long for one line are wrapped in this style
+        "cell": ParagraphStyle(
+            'TaskCell',
+            parent=styles['Normal'],
+            fontName='Helvetica',
+            fontSize=10,
+            leading=12,
+            alignment=1  # Center alignment
+        ),
+        "summary_table": TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 14),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        # Commands shared by every task table; per-row colors are added to a copy
+        "task_table": (
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            # Color the status column based on completion
+            ('TEXTCOLOR', (3, 1), (3, -1), colors.red),  # Default to red for all statuses
+        ),
+    }
+
+
+def write_pdf_report(tasks, path, title="Final Todo Record"):
+    """Write the PDF report with a summary table and a table of all tasks"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table as RLTable, TableStyle, Paragraph, Spacer
+    from reportlab.lib import colors
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from xml.sax.saxutils import escape
+
+    total, completed_count, incomplete_count = summary_counts(tasks)
+    styles = pdf_styles()
+
+    # Create PDF document
+    doc = SimpleDocTemplate(path, pagesize=letter)
+    elements = []
+
+    # Add title
+    elements.append(Paragraph(title, styles["title"]))
+
+    # Add generation date
+    date_para = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles["date"])
+    elements.append(date_para)
+
+    # Add summary table
+    summary_data = [
+        ['Metric', 'Count'],
+        ['Total Tasks', str(total)],
+        ['Completed Tasks', str(completed_count)],
+        ['Incomplete Tasks', str(incomplete_count)]
+    ]
+
+    summary_table_pdf = RLTable(summary_data)
+    summary_table_pdf.setStyle(styles["summary_table"])
+
+    elements.append(summary_table_pdf)
+    elements.append(Spacer(1, 20))
+
+    # Add tasks header
+    elements.append(Paragraph("Task Details", styles["heading"]))
+    elements.append(Spacer(1, 10))
+
+    # The tasks go into page-sized tables. One table per page keeps layout
+    # linear (a single huge table is re-measured every time it is split),
+    # and each repeats the header row if it does spill over a page, e.g.
+    # when some rows wrap onto several lines. Column widths are fixed, and
+    # only titles and descriptions too long for one line are measured.
+    col_widths = [doc.width * share for share in PDF_COLUMN_SHARES]
+    table_style = styles["task_table"]
+    cell_style = styles["cell"]
+    # Left and right cell padding are 6pt each
+    title_width, description_width = col_widths[1] - 12, col_widths[2] - 12
+
+    def cell(text, width):
+        if "\n" not in text and stringWidth(text, "Helvetica", 10) <= width:
+            return text
+        return Paragraph(escape(text).replace("\n", "<br/>"), cell_style)
+
+    def task_table(chunk):
+        task_data = [['ID', 'Title', 'Description', 'Status']]
+        # All style commands are collected first and applied with one setStyle
+        style = list(table_style)
+        for row, task in enumerate(chunk, start=1):
+            title_cell = cell(task.title, title_width)
+            description_cell = cell(task.description, description_width)
+            if task.completed:
+                task_data.append([str(task.id), title_cell, description_cell, "Complete"])
+                style.append(('TEXTCOLOR', (3, row), (3, row), colors.green))
+            else:
+                task_data.append([str(task.id), title_cell, description_cell, "Incomplete"])
+        # Rows grow with wrapped text; a row taller than a page is split
+        table = RLTable(task_data, colWidths=col_widths,
+                        minRowHeights=[PDF_HEADER_HEIGHT] + [PDF_ROW_HEIGHT] * len(chunk),
+                        repeatRows=1, splitInRow=1)
+        table.setStyle(TableStyle(style))
+        return table
+
+    # The page frame has 6pt of padding at the top and bottom. The first
+    # table only gets what is left below the title and summary, so the
+    # following ones line up with page boundaries.
+    frame_height = doc.height - 12
+    rows_per_table = max(1, int((frame_height - PDF_HEADER_HEIGHT) // PDF_ROW_HEIGHT))
+    used = 0
+    for flowable in elements:
+        used += flowable.wrap(doc.width, frame_height)[1] + flowable.getSpaceBefore() + flowable.getSpaceAfter()
+    # One row of slack for rounding in the flowable heights
+    first_rows = int((frame_height - used - PDF_HEADER_HEIGHT) // PDF_ROW_HEIGHT) - 1
+    chunk_starts = [0] if first_rows < 1 else [0, first_rows]
+    chunk_starts.extend(range(chunk_starts[-1] + rows_per_table, len(tasks), rows_per_table))
+    for start, end in zip(chunk_starts, chunk_starts[1:] + [len(tasks)]):
+        if start < end:
+            elements.append(_PendingRows(start, end))
+
+    # Tables are built only when layout reaches them and dropped once their
+    # page is drawn, so only one page of table objects exists at a time
+    def build_pending(flowables):
+        if flowables and isinstance(flowables[0], _PendingRows):
+            flowables[0] = task_table(tasks[flowables[0].start:flowables[0].end])
+    doc.filterFlowables = build_pending
+
+    # Build PDF
+    doc.build(elements)
+    return path
+
+
+@lru_cache(maxsize=None)
+def excel_styles():
+    """Fonts, fills and borders for the Excel export, built once per process"""
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+    thin = Side(style='thin')
+    return {
+        "header_font": Font(bold=True, color="FFFFFF"),
+        "header_fill": PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+        "center": Alignment(horizontal="center", vertical="center"),
+        "border": Border(left=thin, right=thin, top=thin, bottom=thin),
+        "complete_font": Font(color="009900"),  # Green for complete
+        "incomplete_font": Font(color="FF0000"),  # Red for incomplete
+        "title_font": Font(size=16, bold=True, color="FFFFFF"),
+        "bold": Font(bold=True),
+    }
+
+
+def write_excel_report(tasks, path):
+    """Write the Excel workbook: task sheet(s) plus a summary sheet.
+
+    Uses openpyxl's write-only mode, so rows are streamed to disk instead of
+    being kept as cell objects; memory stays flat however many tasks there
+    are. Tasks that do not fit on one sheet continue on "Todo Tasks (2)", ...
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    styles = excel_styles()
+    header_font = styles["header_font"]
+    header_fill = styles["header_fill"]
+    center_alignment = styles["center"]
+    border = styles["border"]
+
+    def styled_cell(ws, value=None, font=None, fill=None, alignment=None, cell_border=None):
+        cell = WriteOnlyCell(ws, value=value)
+        if font:
+            cell.font = font
+        if fill:
+            cell.fill = fill
+        if alignment:
+            cell.alignment = alignment
+        if cell_border:
+            cell.border = cell_border
+        return cell
+
+    headers = ["ID", "Title", "Description", "Status"]
+    rows_per_sheet = EXCEL_MAX_ROWS - 1  # One row for the header
+    for sheet_number, start in enumerate(range(0, max(len(tasks), 1), rows_per_sheet), 1):
+        end = min(start + rows_per_sheet, len(tasks))
+        title = "Todo Tasks" if sheet_number == 1 else f"Todo Tasks ({sheet_number})"
+        ws = wb.create_sheet(title=title)
+
+        # Column widths have to be set before the first row is streamed, so
+        # measure this sheet's values first (lengths only, no cells are built)
+        widths = [len(header) for header in headers]
+        for i in range(start, end):
+            task = tasks[i]
+            widths[0] = max(widths[0], len(str(task.id)))
+            widths[1] = max(widths[1], len(task.title))
+            widths[2] = max(widths[2], len(task.description))
+            widths[3] = max(widths[3], 8 if task.completed else 10)
+        for col, width in enumerate(widths, 1):
+            ws.column_dimensions[get_column_letter(col)].width = min(width + 2, 50)  # Limit max width to 50
+
+        ws.append([styled_cell(ws, header, header_font, header_fill, center_alignment, border)
+                   for header in headers])
+
+        # Rows are serialized as soon as they are appended, so one set of
+        # styled cells is refilled for every row instead of creating new ones
+        id_cell, title_cell, description_cell = (
+            styled_cell(ws, alignment=center_alignment, cell_border=border) for _ in range(3))
+        complete_cell = styled_cell(ws, "Complete", styles["complete_font"],
+                                    alignment=center_alignment, cell_border=border)
+        incomplete_cell = styled_cell(ws, "Incomplete", styles["incomplete_font"],
+                                      alignment=center_alignment, cell_border=border)
+        for i in range(start, end):
+            task = tasks[i]
+            id_cell.value = task.id
+            title_cell.value = task.title
+            description_cell.value = task.description
+            ws.append([id_cell, title_cell, description_cell,
+                       complete_cell if task.completed else incomplete_cell])
+
+    # Add a summary sheet
+    summary_ws = wb.create_sheet(title="Summary")
+    total, completed_count, incomplete_count = summary_counts(tasks)
+    bold = styles["bold"]
+    summary_ws.append([styled_cell(summary_ws, "Todo Application Summary", styles["title_font"], header_fill)])
+    summary_ws.append([])
+    for label, value in (("Total Tasks:", total),
+                         ("Completed Tasks:", completed_count),
+                         ("Incomplete Tasks:", incomplete_count),
+                         ("Export Date:", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))):
+        summary_ws.append([styled_cell(summary_ws, label, bold), value])
+
+    wb.save(path)
+    return path
+
+
+WRITERS = {
+    "txt": write_text_report,
+    "pdf": write_pdf_report,
+    "xlsx": write_excel_report,
+}
+
+
+def serialize_snapshot(tasks):
+    """The task data as compact JSON bytes; hashed for the cache key and
+    handed as-is to report worker processes"""
+    return json.dumps([task.to_dict() for task in tasks], separators=(",", ":")).encode('utf-8')
+
+
+def _render(tasks, fmt, path, title=None):
+    """Render one format to path via a temporary file in the same directory"""
+    # Render under a temporary name so a crash never leaves a truncated
+    # file that would later be served from the cache
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{os.path.splitext(name)[0]}.{os.getpid()}.{fmt}")
+    try:
+        with metrics.timer("todo_report_render_seconds", format=fmt):
+            if fmt == "pdf" and title:
+                write_pdf_report(tasks, tmp_path, title=title)
+            else:
+                WRITERS[fmt](tasks, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def _pool_context():
+    """Start method for report worker processes.
+
+    Spawned workers begin from a fresh interpreter. Forking (the default on
+    Linux) would copy a parent with background threads running, e.g. the
+    outbox worker or a write-behind flusher, and any lock one of them held
+    stays locked forever in the child.
+    """
+    import multiprocessing
+    return multiprocessing.get_context("spawn")
+
+
+def _render_snapshot(snapshot, fmt, path, title=None):
+    """Worker process entry point: rebuild the todos and render one format"""
+    from todo import Todo
+    tasks = [Todo.from_dict(item) for item in json.loads(snapshot)]
+    return _render(tasks, fmt, path, title)
+
+
+def _collect(futures, missing, results, on_done):
+    """Wait for worker futures ({future: fmt}) and record their results;
+    the first error is raised once every job has finished"""
+    from concurrent.futures import as_completed
+    errors = []
+    for future in as_completed(futures):
+        fmt = futures[future]
+        try:
+            results[fmt] = (future.result(), False)
+        except Exception as e:
+            errors.append(e)
+            continue
+        if on_done:
+            on_done(fmt, missing[fmt], False)
+    if errors:
+        raise errors[0]
+
+
+def build_reports(tasks, formats, prefix="final_record", title=None, directory=None,
+                  parallel=None, on_done=None, worker=None):
+    """Return {format: (path, reused)} for the requested report formats.
+
+    A format is rendered only if no file exists yet for the same task data,
+    format and title; otherwise the cached file is reused (and marked as
+    recently used for the retention policy). When more than one format has
+    to be rendered, parallel is on (default: TODO_REPORT_PARALLEL) and the
+    machine has more than one CPU, the formats are rendered in worker
+    processes from the same serialized snapshot. With a worker (a running
+    report_worker.ReportWorker) every missing format is sent to its warm
+    processes instead. on_done(fmt, path, reused) is called as each format
+    finishes.
+    """
+    directory = directory or REPORT_DIR
+    if parallel is None:
+        parallel = REPORT_PARALLEL
+    started = time.perf_counter()
+
+    def finished(fmt, path, reused):
+        # Time from the request to this format being ready, wherever it rendered
+        metrics.observe("todo_report_seconds", time.perf_counter() - started, format=fmt, reused=str(reused).lower())
+        if on_done:
+            on_done(fmt, path, reused)
+
+    os.makedirs(directory, exist_ok=True)
+    snapshot = serialize_snapshot(tasks)
+    data_digest = hashlib.sha256(snapshot).hexdigest()
+    results = {}
+    missing = {}
+    for fmt in formats:
+        key = hashlib.sha256(f"{REPORT_VERSION}:{fmt}:{title}:{data_digest}".encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(directory, f"{prefix}_{key}.{fmt}")
+        if os.path.exists(path):
+            os.utime(path)
+            results[fmt] = (path, True)
+            finished(fmt, path, True)
+        else:
+            missing[fmt] = path
+
+    workers = min(len(missing), os.cpu_count() or 1)
+    if worker is not None and missing:
+        futures = {worker.submit(snapshot, fmt, path, title): fmt for fmt, path in missing.items()}
+        _collect(futures, missing, results, finished)
+    elif parallel and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            futures = {pool.submit(_render_snapshot, snapshot, fmt, path, title): fmt
+                       for fmt, path in missing.items()}
+            _collect(futures, missing, results, finished)
+    else:
+        for fmt, path in missing.items():
+            results[fmt] = (_render(tasks, fmt, path, title), False)
+            finished(fmt, path, False)
+
+    # Never prune what this call is about to return, however small KEEP is
+    prune_reports(directory, exclude=[path for path, _ in results.values()])
+    # In the order the formats were asked for
+    return {fmt: results[fmt] for fmt in formats}
+
+
+def prune_reports(directory=None, keep=None, max_age_days=None, exclude=()):
+    """Delete cached reports beyond the newest `keep` or older than max_age_days.
+
+    Paths in exclude are never deleted, but count towards `keep`. Returns
+    the number of files removed.
+    """
+    directory = directory or REPORT_DIR
+    keep = REPORT_KEEP if keep is None else keep
+    max_age_days = REPORT_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    if not os.path.isdir(directory):
+        return 0
+
+    cached = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and _CACHED_NAME.match(entry.name):
+            cached.append((entry.stat().st_mtime, entry.path))
+    cached.sort(reverse=True)
+
+    protected = {os.path.abspath(path) for path in exclude}
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    kept = 0
+    for mtime, path in cached:
+        if os.path.abspath(path) in protected:
+            kept += 1
+        elif kept >= keep or mtime < cutoff:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                print(f"Error removing old report {path}: {e}")
+        else:
+            kept += 1
+    return removed
@@ -0,0 +1,126 @@
+import re
+from bisect import bisect_left, insort
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into case-folded words"""
+    return [word.casefold() for word in _WORD.findall(text or "")]
+
+
+class SearchIndex:
+    """Inverted index from words in titles/descriptions to todo ids.
+
+    Every query word is matched as a prefix ("rep" finds "report"), all
+    query words must match (AND), and results are ranked by how often and
+    where the words occur: title hits weigh more than description hits and
+    exact words more than prefixes.
+    """
+
+    TITLE_WEIGHT = 3
+    DESCRIPTION_WEIGHT = 1
+    PREFIX_FACTOR = 0.5
+    # Vocabulary changes up to this size are applied word by word at the next
+    # query; larger ones (e.g. building the index) are filtered and sorted at once
+    SMALL_CHANGE = 64
+
+    def __init__(self):
+        # word -> {todo_id: weight}
+        self._postings = {}
+        # todo_id -> words indexed for it, so removal touches only its postings
+        self._words = {}
+        # Sorted vocabulary for prefix lookups. Words added or dropped since
+        # the last query are only noted, and folded in by the next query, so
+        # building the index does not shift the list once per new word.
+        self._vocabulary = []
+        self._new_words = set()
+        self._dropped_words = set()
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, todo):
+        """Index a todo, replacing whatever was indexed for its id before"""
+        self.remove(todo.id)
+        weights = {}
+        for word in tokenize(todo.title):
+            weights[word] = weights.get(word, 0) + self.TITLE_WEIGHT
+        for word in tokenize(todo.description):
+            weights[word] = weights.get(word, 0) + self.DESCRIPTION_WEIGHT
+        for word, weight in weights.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                self._new_words.add(word)
+            postings[todo.id] = weight
+        self._words[todo.id] = tuple(weights)
+
+    def remove(self, todo_id):
+        """Drop a todo from the index (no-op if it is not indexed)"""
+        for word in self._words.pop(todo_id, ()):
+            postings = self._postings[word]
+            del postings[todo_id]
+            if not postings:
+                del self._postings[word]
+                if word in self._new_words:
+                    self._new_words.discard(word)
+                else:
+                    self._dropped_words.add(word)
+
+    def _sorted_vocabulary(self):
+        """The vocabulary, brought up to date with the words noted since the last query"""
+        vocabulary = self._vocabulary
+        if len(self._new_words) + len(self._dropped_words) <= self.SMALL_CHANGE:
+            # A few edits: place each word where it belongs
+            for word in self._dropped_words:
+                del vocabulary[bisect_left(vocabulary, word)]
+            for word in self._new_words:
+                insort(vocabulary, word)
+            self._new_words = set()
+            self._dropped_words = set()
+            return vocabulary
+        if self._dropped_words:
+            dropped = self._dropped_words
+            # A dropped word that came back is in _new_words and is re-added below
+            self._vocabulary = [word for word in self._vocabulary if word not in dropped]
+            self._dropped_words = set()
+        if self._new_words:
+            # The list is sorted but for the new tail, which sorts in about linear time
+            self._vocabulary.extend(self._new_words)
+            self._vocabulary.sort()
+            self._new_words = set()
+        return self._vocabulary
+
+    def _matches(self, term):
+        """Scores for every todo containing a word that starts with term"""
+        scores = {}
+        vocabulary = self._sorted_vocabulary()
+        for position in range(bisect_left(vocabulary, term), len(vocabulary)):
+            word = vocabulary[position]
+            if not word.startswith(term):
+                break
+            factor = 1.0 if word == term else self.PREFIX_FACTOR
+            for todo_id, weight in self._postings[word].items():
+                scores[todo_id] = scores.get(todo_id, 0) + weight * factor
+        return scores
+
+    def search(self, query, limit=None):
+        """Return ids of todos matching every word in query, best first"""
+        terms = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not terms:
+            return []
+        scores = None
+        # Longest terms first: they tend to be the most selective, which
+        # keeps the running intersection small
+        for term in terms:
+            matches = self._matches(term)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {todo_id: score + matches[todo_id]
+                          for todo_id, score in scores.items() if todo_id in matches}
+            if not scores:
+                return []
+        ranked = sorted(scores, key=lambda todo_id: (-scores[todo_id], todo_id))
+        return ranked[:limit] if limit else ranked
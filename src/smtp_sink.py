@@ -0,0 +1,182 @@
+"""
+An in-process SMTP server for trying out and benchmarking email without
+real credentials.
+
+Set EMAIL_SMTP_SERVER=local and email_sender talks to the shared SMTPSink
+instead of a mail provider. Each connection is one end of a socketpair
+whose other end is served by a thread in this process, so smtplib runs its
+full protocol (EHLO, AUTH, MAIL/RCPT/DATA) with no network involved.
+Accepted messages are counted and the last EMAIL_LOCAL_KEEP (default 100)
+are kept in memory; with EMAIL_LOCAL_DIR set each one is also written there
+as an .eml file. Addresses containing "reject" are refused with a 550, to
+try out error handling.
+"""
+import os
+import smtplib
+import socket
+import threading
+import time
+from collections import deque
+
+
+class SMTPSink:
+    """Accepts SMTP sessions over in-process sockets and keeps what it receives.
+
+    ``latency`` (seconds) is added before every reply to mimic a network
+    round-trip, and ``login_delay`` to the greeting and AUTH to mimic the
+    TLS handshake and password check of a real server.
+    """
+
+    def __init__(self, keep=None, directory=None, latency=0.0, login_delay=0.0):
+        self.keep = int(os.getenv('EMAIL_LOCAL_KEEP', '100')) if keep is None else keep
+        self.directory = os.getenv('EMAIL_LOCAL_DIR') if directory is None else directory
+        self.latency = latency
+        self.login_delay = login_delay
+        self.messages = deque(maxlen=self.keep) if self.keep else None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero the counters and forget kept messages"""
+        with self._lock:
+            self.connections = 0
+            self.message_count = 0
+            self.recipient_count = 0
+            self.bytes_received = 0
+            if self.messages is not None:
+                self.messages.clear()
+
+    def connect(self):
+        """A connected client socket served by a new sink thread"""
+        client, server = socket.socketpair()
+        with self._lock:
+            self.connections += 1
+        threading.Thread(target=self._serve, args=(server,), name="smtp-sink", daemon=True).start()
+        return client
+
+    def _reply(self, out, line, delay=0.0):
+        time.sleep(self.latency + delay)
+        out.write(line.encode('ascii') + b"\r\n")
+        out.flush()
+
+    def _serve(self, sock):
+        with sock, sock.makefile('rb') as lines, sock.makefile('wb') as out:
+            try:
+                self._session(lines, out)
+            except (OSError, ValueError):
+                pass  # Client went away
+
+    def _session(self, lines, out):
+        self._reply(out, "220 localhost todo SMTP sink", self.login_delay)
+        sender, recipients = None, []
+        while True:
+            line = lines.readline()
+            if not line:
+                return
+            command, _, argument = line.decode('utf-8', 'replace').strip().partition(" ")
+            command = command.upper()
+            if command in ("EHLO", "HELO"):
+                if command == "EHLO":
+                    out.write(b"250-localhost\r\n250-8BITMIME\r\n")
+                self._reply(out, "250 AUTH PLAIN LOGIN")
+            elif command == "AUTH":
+                if argument.upper() == "LOGIN":
+                    # Username and password prompts; any credentials are fine
+                    self._reply(out, "334 VXNlcm5hbWU6")
+                    lines.readline()
+                    self._reply(out, "334 UGFzc3dvcmQ6")
+                    lines.readline()
+                self._reply(out, "235 Authentication successful", self.login_delay)
+            elif command == "MAIL":
+                sender, recipients = argument.partition(":")[2].strip(), []
+                self._reply(out, "250 OK")
+            elif command == "RCPT":
+                address = argument.partition(":")[2].strip().strip("<>")
+                if "reject" in address.lower():
+                    self._reply(out, f"550 No such user <{address}>")
+                else:
+                    recipients.append(address)
+                    self._reply(out, "250 OK")
+            elif command == "DATA":
+                if not recipients:
+                    self._reply(out, "503 Need RCPT first")
+                    continue
+                self._reply(out, "354 End data with <CR><LF>.<CR><LF>")
+                self._receive(lines, out, sender, recipients)
+                sender, recipients = None, []
+            elif command == "RSET":
+                sender, recipients = None, []
+                self._reply(out, "250 OK")
+            elif command == "NOOP":
+                self._reply(out, "250 OK")
+            elif command == "QUIT":
+                self._reply(out, "221 Bye")
+                return
+            elif command == "STARTTLS":
+                self._reply(out, "454 TLS not available on the local sink")
+            else:
+                self._reply(out, "502 Command not implemented")
+
+    def _receive(self, lines, out, sender, recipients):
+        """Read one DATA body; only kept messages are held in memory"""
+        keep = self.messages is not None or self.directory
+        body = [] if keep else None
+        size = 0
+        for line in lines:
+            if line == b".\r\n":
+                break
+            if line.startswith(b".."):
+                line = line[1:]
+            size += len(line)
+            if keep:
+                body.append(line)
+        else:
+            return  # Connection closed mid-message
+        with self._lock:
+            self.message_count += 1
+            self.recipient_count += len(recipients)
+            self.bytes_received += size
+            number = self.message_count
+        if keep:
+            data = b"".join(body)
+            if self.messages is not None:
+                self.messages.append({"from": sender, "to": recipients, "data": data})
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(os.path.join(self.directory, f"{int(time.time())}-{number:06d}.eml"), 'wb') as f:
+                    f.write(data)
+        self._reply(out, "250 OK: queued")
+
+
+class LocalSMTP(smtplib.SMTP):
+    """smtplib.SMTP connected to an SMTPSink instead of a server address"""
+
+    def __init__(self, sink=None, timeout=30):
+        self.sink = sink or get_sink()
+        super().__init__("localhost", 25, timeout=timeout)
+
+    def _get_socket(self, host, port, timeout):
+        sock = self.sink.connect()
+        sock.settimeout(timeout)
+        return sock
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    """The shared sink used for EMAIL_SMTP_SERVER=local"""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = SMTPSink()
+        return _sink
+
+
+def use_sink(sink):
+    """Make sink the shared one, e.g. a sink with latency for benchmarks"""
+    global _sink
+    with _sink_lock:
+        _sink = sink
+    return sink
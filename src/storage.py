@@ -0,0 +1,529 @@
+"""
+Storage backends for TodoManager.
+
+TodoManager keeps the todos in memory and hands every change to a storage
+object as a list of small mutation records:
+
+    {"op": "put", "todo": {...}}   insert or replace one todo
+    {"op": "delete", "id": N}      remove one todo
+
+Backends decide how to persist them: the JSON file and the binary snapshot
+(JournaledStorage) rewrite the snapshot or append to a journal, SQLite
+applies them as row-level writes.
+"""
+import json
+import os
+import re
+import sys
+import time
+from contextlib import nullcontext
+import metrics
+from todo import Todo
+from journal import TodoJournal
+from file_lock import FileLock, UsageClaim
+
+STORAGE_BACKENDS = ("json", "journal", "sqlite", "binary")
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def iter_json_array(f, chunk_size=64 * 1024):
+    """Yield the items of a top-level JSON array one at a time.
+
+    Only a chunk of text plus the item being decoded is held in memory, so
+    peak usage does not grow with the size of the file.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    opened = False
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        if pos == len(buf):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+
+        char = buf[pos]
+        if not opened:
+            if char != "[":
+                raise ValueError("Expected a JSON array")
+            opened = True
+            pos += 1
+        elif char == "]":
+            return
+        elif char == ",":
+            pos += 1
+        else:
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                # The item is cut off at the end of the buffer; read more
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield item
+
+
+def apply_record(todos, record):
+    """Apply one mutation record to an id -> Todo store, updating todos in place"""
+    if record["op"] == "put":
+        item = record["todo"]
+        todo = todos.get(item["id"])
+        if todo is None:
+            todos[item["id"]] = Todo.from_dict(item)
+        else:
+            todo.title = item["title"]
+            todo.description = item["description"]
+            todo.completed = item["completed"]
+    elif record["op"] == "delete":
+        todos.pop(record["id"], None)
+
+
+def diff_records(loaded, current):
+    """Mutation records that turn ``current`` (an id -> Todo store) into ``loaded``"""
+    records = []
+    seen = set()
+    for todo in loaded:
+        seen.add(todo.id)
+        existing = current.get(todo.id)
+        if (existing is None
+                or existing.title != todo.title
+                or existing.description != todo.description
+                or existing.completed != todo.completed):
+            records.append({"op": "put", "todo": todo.to_dict()})
+    for todo_id in list(current):
+        if todo_id not in seen:
+            records.append({"op": "delete", "id": todo_id})
+    return records
+
+
+def file_fingerprint(path):
+    """Cheap change marker for a file: (inode, size, mtime), or None if missing.
+
+    Atomic saves replace the file, so the inode changes even when the size
+    and timestamp happen to match.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def atomic_write_bytes(path, chunks):
+    """Replace a file's contents without ever leaving it half-written.
+
+    The data (bytes or an iterable of byte chunks) goes to a temporary file in
+    the same directory, which is fsynced and then renamed over the target, so
+    a crash leaves either the old or the new version on disk.
+    """
+    if isinstance(chunks, (bytes, bytearray)):
+        chunks = [chunks]
+    import tempfile  # Only needed once something is saved
+    start = time.perf_counter()
+    written = 0
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable (POSIX only)
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    metrics.io("write", written, time.perf_counter() - start)
+
+
+def atomic_write_text(path, text):
+    """Atomically replace a file with UTF-8 text (see atomic_write_bytes)"""
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+class TodoStorage:
+    """Interface shared by all storage backends"""
+
+    # Lazy backends return a ready-made id -> Todo store from load() that
+    # materializes todos on access, instead of a plain iterable of todos
+    lazy = False
+
+    def load(self):
+        """Return the stored todos as an iterable of Todo objects in display order"""
+        raise NotImplementedError
+
+    def apply(self, records, todos):
+        """Persist mutation records.
+
+        ``todos`` is a zero-argument callable returning the current todos, for
+        backends that need to rewrite everything.
+        """
+        raise NotImplementedError
+
+    def save_all(self, todos):
+        """Replace the stored data with the given todos; return True on success"""
+        raise NotImplementedError
+
+    def compact(self, todos):
+        """Fold any incremental state into the main store (no-op by default)"""
+
+    def lock(self):
+        """Context manager held around writes to keep other processes out"""
+        return nullcontext()
+
+    def changed(self):
+        """Cheaply check whether another process changed the stored data"""
+        return False
+
+    def reload_changes(self, current):
+        """Return the mutation records another process made, relative to
+        ``current`` (the caller's id -> Todo store)"""
+        return []
+
+    def close(self):
+        """Release any open handles"""
+
+
+class JournaledStorage(TodoStorage):
+    """A snapshot file, optionally with an append-only journal next to it.
+
+    In journal mode mutations are appended to "<path>.log" instead of
+    rewriting the snapshot; the log is replayed over the snapshot on load and
+    folded back into it once it grows past its record or size threshold.
+    Subclasses only decide how the snapshot itself is read and written.
+    """
+
+    def __init__(self, path, journal=False, journal_max_records=1000,
+                 journal_max_bytes=1024 * 1024):
+        self.path = path
+        self.journal = None
+        if journal:
+            self.journal = TodoJournal(
+                path + ".log",
+                max_records=journal_max_records,
+                max_bytes=journal_max_bytes
+            )
+        self._lock = FileLock(path + ".lock")
+        self.claim = UsageClaim(path + ".users")
+        # Fingerprints of the snapshot and journal as of our last read/write
+        self._seen = None
+
+    def _load_snapshot(self):
+        """The id -> Todo store to serve from, read from the snapshot"""
+        return self._read_snapshot()
+
+    def _read_snapshot(self):
+        """Every todo in the snapshot, as an id -> Todo dict"""
+        raise NotImplementedError
+
+    def _write_snapshot(self, todos):
+        """Replace the snapshot with a list of todos; raise on failure"""
+        raise NotImplementedError
+
+    def _release_snapshot(self):
+        """Stop reading from the snapshot file before it is replaced"""
+
+    def _fingerprint(self):
+        journal = file_fingerprint(self.journal.path) if self.journal else None
+        return file_fingerprint(self.path), journal
+
+    def _replay(self, todos):
+        # Apply the mutations recorded in the journal on top of the snapshot
+        if self.journal:
+            try:
+                for record in self.journal.replay():
+                    apply_record(todos, record)
+            except Exception as e:
+                print(f"Error replaying journal: {e}")
+        return todos
+
+    def lock(self):
+        return self._lock
+
+    def load(self):
+        """Load todos from the snapshot and replay the journal on top"""
+        todos = self._replay(self._load_snapshot())
+        if self.journal and self.journal.needs_compaction():
+            with self._lock:
+                self.compact(lambda: list(todos.values()))
+        self._seen = self._fingerprint()
+        return todos if self.lazy else todos.values()
+
+    def _read(self):
+        """Every todo in the snapshot plus the journal, as an id -> Todo dict"""
+        return self._replay(self._read_snapshot())
+
+    def changed(self):
+        return self._fingerprint() != self._seen
+
+    def reload_changes(self, current):
+        snapshot, journal = self._fingerprint()
+        seen_snapshot, seen_journal = self._seen
+        if (self.journal and snapshot == seen_snapshot and journal is not None
+                and seen_journal is not None and journal[0] == seen_journal[0]
+                and journal[1] >= seen_journal[1]):
+            # Only the journal grew: read just the records appended since
+            records = list(self.journal.read_new())
+        else:
+            records = diff_records(self._read().values(), current)
+        self._seen = self._fingerprint()
+        return records
+
+    def apply(self, records, todos):
+        with self._lock:
+            if not self.journal:
+                self.save_all(todos())
+                return
+            try:
+                self.journal.append(records)
+            except Exception as e:
+                print(f"Error writing to journal: {e}")
+                # Fall back to a full snapshot so the change is not lost
+                self.compact(todos)
+                return
+            if self.journal.needs_compaction():
+                self.compact(todos)
+            self._seen = self._fingerprint()
+
+    def save_all(self, todos):
+        """Replace the snapshot with todos, folding in the journal"""
+        try:
+            todos = list(todos)
+            self._release_snapshot()
+            # Write the snapshot before dropping the log: if we crash in
+            # between, replaying the (idempotent) log over it is harmless
+            with self._lock:
+                self._write_snapshot(todos)
+                if self.journal:
+                    self.journal.clear()
+                self._seen = self._fingerprint()
+            return True
+        except Exception as e:
+            print(f"Error saving to file: {e}")
+            return False
+
+    def compact(self, todos):
+        """Fold the journal back into the snapshot"""
+        if not self.journal:
+            return
+        with self._lock:
+            self.save_all(todos())
+
+    def close(self):
+        self._release_snapshot()
+        self.claim.release()
+
+
+class JsonFileStorage(JournaledStorage):
+    """The original todos.json file, optionally with an append-only journal"""
+
+    def __init__(self, data_file, journal=False, journal_max_records=1000,
+                 journal_max_bytes=1024 * 1024):
+        super().__init__(data_file, journal, journal_max_records, journal_max_bytes)
+        self.data_file = data_file
+
+    def _read_snapshot(self):
+        todos = {}
+        if os.path.exists(self.data_file):
+            try:
+                start = time.perf_counter()
+                with open(self.data_file, 'r', encoding='utf-8') as f:
+                    # Records are decoded incrementally rather than parsing the
+                    # whole document into a list first.
+                    for item in iter_json_array(f):
+                        todo = Todo.from_dict(item)
+                        todos[todo.id] = todo
+                    metrics.io("read", f.buffer.tell(), time.perf_counter() - start)
+            except Exception as e:
+                print(f"Error loading from file: {e}")
+                todos = {}
+        return todos
+
+    def _write_snapshot(self, todos):
+        data = [todo.to_dict() for todo in todos]
+        atomic_write_text(self.data_file, json.dumps(data, indent=2))
+
+
+class SqliteStorage(TodoStorage):
+    """SQLite database with row-level writes (stdlib sqlite3, WAL mode)"""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS todos ("
+        " id INTEGER PRIMARY KEY,"
+        " title TEXT NOT NULL,"
+        " description TEXT NOT NULL DEFAULT '',"
+        " completed INTEGER NOT NULL DEFAULT 0"
+        ")",
+        # id is the rowid, so lookups by id are already indexed
+        "CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos (completed)",
+    )
+    UPSERT_SQL = "INSERT OR REPLACE INTO todos (id, title, description, completed) VALUES (?, ?, ?, ?)"
+    DELETE_SQL = "DELETE FROM todos WHERE id = ?"
+    SELECT_SQL = "SELECT id, title, description, completed FROM todos ORDER BY id"
+
+    def __init__(self, db_file):
+        import sqlite3  # Only loaded when this backend is chosen
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            for statement in self.SCHEMA:
+                self.conn.execute(statement)
+        # SQLite serializes the writes themselves; the file lock makes the
+        # manager's check-then-write sequence atomic across processes.
+        self._lock = FileLock(db_file + ".lock")
+        self.claim = UsageClaim(db_file + ".users")
+        self._data_version = self._current_data_version()
+
+    def _current_data_version(self):
+        # Changes whenever another connection commits to the database
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def lock(self):
+        return self._lock
+
+    def changed(self):
+        return self._current_data_version() != self._data_version
+
+    def reload_changes(self, current):
+        self._data_version = self._current_data_version()
+        return diff_records(self.load(), current)
+
+    @staticmethod
+    def _row(todo):
+        return (todo["id"], todo["title"], todo["description"], int(todo["completed"]))
+
+    def load(self):
+        todos = []
+        try:
+            self._data_version = self._current_data_version()
+            for todo_id, title, description, completed in self.conn.execute(self.SELECT_SQL):
+                todos.append(Todo.from_dict({
+                    "id": todo_id,
+                    "title": title,
+                    "description": description,
+                    "completed": bool(completed)
+                }))
+        except Exception as e:
+            print(f"Error loading from database: {e}")
+        return todos
+
+    def apply(self, records, todos):
+        puts = [self._row(r["todo"]) for r in records if r["op"] == "put"]
+        deletes = [(r["id"],) for r in records if r["op"] == "delete"]
+        try:
+            # One transaction per batch of records; the statements are cached
+            # and reused by sqlite3 across calls.
+            with self._lock, self.conn:
+                if puts:
+                    self.conn.executemany(self.UPSERT_SQL, puts)
+                if deletes:
+                    self.conn.executemany(self.DELETE_SQL, deletes)
+        except Exception as e:
+            print(f"Error saving to database: {e}")
+
+    def save_all(self, todos):
+        try:
+            with self._lock, self.conn:
+                self.conn.execute("DELETE FROM todos")
+                self.conn.executemany(self.UPSERT_SQL, (self._row(todo.to_dict()) for todo in todos))
+            return True
+        except Exception as e:
+            print(f"Error saving to database: {e}")
+            return False
+
+    def close(self):
+        self.conn.close()
+        self.claim.release()
+
+
+def sqlite_path_for(data_file):
+    """Database file used by the sqlite backend for a given todos.json path"""
+    return os.path.splitext(data_file)[0] + ".db"
+
+
+def create_storage(data_file, backend=None, durability=None, flush_interval_ms=None):
+    """Build the storage backend named by ``backend`` or the TODO_STORAGE env var.
+
+    ``durability`` (or TODO_DURABILITY) controls when changes hit the disk:
+    "always" writes on every mutation, "debounce" coalesces bursts in a
+    background thread every TODO_FLUSH_INTERVAL_MS (default 200 ms), and
+    "exit" only writes when the manager is closed or the program exits.
+    """
+    from write_behind import DURABILITY_POLICIES, WriteBehindStorage
+
+    if backend is None:
+        backend = os.getenv('TODO_STORAGE', 'json')
+    backend = backend.lower()
+    if backend == "json":
+        storage = JsonFileStorage(data_file)
+    elif backend == "journal":
+        storage = JsonFileStorage(data_file, journal=True)
+    elif backend == "sqlite":
+        storage = SqliteStorage(sqlite_path_for(data_file))
+    elif backend == "binary":
+        from binary_snapshot import BinarySnapshotStorage, binary_path_for
+        storage = BinarySnapshotStorage(binary_path_for(data_file))
+    else:
+        raise ValueError(f"Unknown storage backend '{backend}', expected one of: {', '.join(STORAGE_BACKENDS)}")
+
+    if durability is None:
+        durability = os.getenv('TODO_DURABILITY', 'always')
+    durability = durability.lower()
+    if durability not in DURABILITY_POLICIES:
+        raise ValueError(f"Unknown durability policy '{durability}', expected one of: {', '.join(DURABILITY_POLICIES)}")
+    if durability == "always":
+        return storage
+    if flush_interval_ms is None:
+        flush_interval_ms = int(os.getenv('TODO_FLUSH_INTERVAL_MS', '200'))
+    return WriteBehindStorage(storage, policy=durability, interval_ms=flush_interval_ms)
+
+
+def migrate_json_to_sqlite(json_file, db_file=None):
+    """Copy every todo from a todos.json file (and its journal) into SQLite"""
+    if db_file is None:
+        db_file = sqlite_path_for(json_file)
+    source = JsonFileStorage(json_file, journal=os.path.exists(json_file + ".log"))
+    try:
+        todos = list(source.load())
+    finally:
+        source.close()
+    target = SqliteStorage(db_file)
+    try:
+        if not target.save_all(todos):
+            raise RuntimeError(f"could not write {db_file}")
+    finally:
+        target.close()
+    return len(todos)
+
+
+if __name__ == "__main__":
+    # python src/storage.py migrate [todos.json] [todos.db]
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("Usage: python storage.py migrate [todos.json] [todos.db]")
+        sys.exit(1)
+    source = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(__file__), "todos.json")
+    target = sys.argv[3] if len(sys.argv) > 3 else sqlite_path_for(source)
+    count = migrate_json_to_sqlite(source, target)
+    print(f"Migrated {count} todos from {source} to {target}")
@@ -1,9 +1,10 @@
 class Todo:
-    next_id = 1
+    # No per-instance __dict__: large lists hold millions of these
+    __slots__ = ("id", "title", "description", "completed")
 
-    def __init__(self, title, description=""):
-        self.id = Todo.next_id
-        Todo.next_id += 1
+    def __init__(self, todo_id, title, description=""):
+        # Ids are allocated by the owning TodoManager
+        self.id = todo_id
         self.title = title
         self.description = description
         self.completed = False
@@ -12,6 +13,16 @@ class Todo:
         status = "Complete" if self.completed else "Incomplete"
         return f"ID: {self.id}, Title: {self.title}, Description: {self.description}, Status: {status}"
 
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a saved Todo from its dict form"""
+        todo = cls.__new__(cls)
+        todo.id = data["id"]
+        todo.title = data["title"]
+        todo.description = data.get("description", "")
+        todo.completed = data.get("completed", False)
+        return todo
+
     def to_dict(self):
         return {
             "id": self.id,
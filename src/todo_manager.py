@@ -1,99 +1,339 @@
-import json
 import os
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
 from todo import Todo
-from rich.console import Console
+from id_allocator import IdAllocator
+from storage import TodoStorage, apply_record, create_storage
 
 class TodoManager:
-    def __init__(self, data_file="todos.json"):
+    """Owns the todo list and its persistence.
+
+    All public methods are safe to call from several threads: they run
+    under one re-entrant lock, and ids come from the manager's own
+    IdAllocator (optionally handing each thread a block of ``id_block_size``
+    ids at a time).
+    """
+
+    def __init__(self, data_file="todos.json", storage=None, columnar=None, id_block_size=1):
         self.data_file = data_file
-        self.todos = []
+        # Lock order is manager lock -> storage lock; never the reverse
+        self._lock = threading.RLock()
+        self._ids = IdAllocator(block_size=id_block_size)
+        # storage may be a TodoStorage instance or a backend name ("json",
+        # "journal", "sqlite"); by default TODO_STORAGE picks it, falling back to json.
+        if isinstance(storage, TodoStorage):
+            self.storage = storage
+        else:
+            self.storage = create_storage(data_file, storage)
+        # Todos keyed by id; dicts keep insertion order, so iterating the
+        # values still yields tasks in the order they were added. With
+        # columnar=True (or TODO_COLUMNAR=True) a ColumnarTodoStore is used
+        # instead to cut per-task memory on very large lists.
+        if columnar is None:
+            columnar = os.getenv('TODO_COLUMNAR', 'False').lower() == 'true'
+        if columnar and self.storage.lazy:
+            print("Warning: columnar storage is ignored with the binary backend, which keeps todos in its own mapped store")
+            columnar = False
+        self.columnar = columnar
+        self._todos = self._new_store()
+        # Records collected while a batch() block is open, keyed by todo id so
+        # repeated changes to the same task collapse into one write.
+        self._batch_depth = 0
+        self._pending = {}
+        # State of each todo before the open batch first changed it (None
+        # for todos it added), so a failed batch can be undone
+        self._undo = {}
+        # Full-text index, built on the first search() and then kept up to
+        # date by every change
+        self._search_index = None
+        # Record count, duration and throughput of the last load_from_file()
+        self.load_stats = None
         self.load_from_file()
 
+    def _new_store(self):
+        if self.columnar:
+            from columnar_store import ColumnarTodoStore
+            return ColumnarTodoStore()
+        return {}
+
+    @property
+    def todos(self):
+        """All todos in insertion order"""
+        return self._snapshot()
+
+    def _snapshot(self):
+        """Current todos as a list, safe to hand to a background writer"""
+        with self._lock:
+            return list(self._todos.values())
+
     def save_to_file(self):
-        """Save todos to a JSON file"""
-        try:
-            # Prepare data for serialization
-            data = []
-            for todo in self.todos:
-                # Store the next_id to maintain ID sequence
-                data.append({
-                    "id": todo.id,
-                    "title": todo.title,
-                    "description": todo.description,
-                    "completed": todo.completed
-                })
-
-            # Save to file
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving to file: {e}")
+        """Write every todo to the storage backend"""
+        with self._lock:
+            return self.storage.save_all(self._snapshot())
 
     def load_from_file(self):
-        """Load todos from a JSON file"""
-        if os.path.exists(self.data_file):
-            try:
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-
-                self.todos = []
-                max_id = 0
-                for item in data:
-                    todo = Todo(item["title"], item["description"])
-                    # Override the auto-generated ID with the saved ID
-                    todo.id = item["id"]
-                    todo.completed = item["completed"]
-                    self.todos.append(todo)
-                    if todo.id > max_id:
-                        max_id = todo.id
-
-                # Set the next_id to continue from the highest ID
-                Todo.next_id = max_id + 1
-            except Exception as e:
-                print(f"Error loading from file: {e}")
-                self.todos = []
-        else:
-            # If no file exists, initialize with empty list
-            self.todos = []
+        """Load todos from the storage backend"""
+        start = time.perf_counter()
+        with self._lock:
+            if self.storage.lazy:
+                self._todos = self.storage.load()
+            else:
+                self._todos = self._new_store()
+                for todo in self.storage.load():
+                    self._todos[todo.id] = todo
+            # Continue the id sequence from the highest saved id
+            self._ids.reset(max(self._todos, default=0) + 1)
+            self._search_index = None
+
+        seconds = time.perf_counter() - start
+        self.load_stats = {
+            "records": len(self._todos),
+            "seconds": seconds,
+            "records_per_sec": len(self._todos) / seconds if seconds > 0 else 0.0
+        }
+
+    def compact(self):
+        """Fold incremental storage state (e.g. the journal) into the main store"""
+        with self._lock, self.storage.lock():
+            self.storage.compact(self._snapshot)
+
+    def close(self):
+        """Flush and release the storage backend"""
+        # Not under self._lock: a background flush may need it to finish
+        self.storage.close()
+
+    def refresh(self):
+        """Merge changes other processes made to the storage since we last looked.
+
+        The check is a cheap stat/version comparison; only when it reports a
+        change are the differing records fetched and applied in place.
+        Returns the number of records merged.
+        """
+        with self._lock:
+            if self._batch_depth or not self.storage.changed():
+                return 0
+            records = self.storage.reload_changes(self._todos)
+            for record in records:
+                apply_record(self._todos, record)
+                if record["op"] == "put":
+                    self._ids.advance_past(record["todo"]["id"])
+                    self._index_put(self._todos.get(record["todo"]["id"]))
+                else:
+                    self._index_remove(record["id"])
+            return len(records)
+
+    def _index_put(self, todo):
+        if self._search_index is not None:
+            self._search_index.add(todo)
+
+    def _index_remove(self, todo_id):
+        if self._search_index is not None:
+            self._search_index.remove(todo_id)
+
+    def search(self, query, limit=None):
+        """Return todos whose title/description contain every word of query
+        (as a word prefix), best matches first"""
+        with self._lock:
+            self.refresh()
+            if self._search_index is None:
+                from search_index import SearchIndex
+                self._search_index = SearchIndex()
+                for todo in self._todos.values():
+                    self._search_index.add(todo)
+            return [self._todos.get(todo_id) for todo_id in self._search_index.search(query, limit)]
+
+    @contextmanager
+    def _write_guard(self):
+        """Hold the locks and catch up with other processes before a change"""
+        with self._lock, self.storage.lock():
+            self.refresh()
+            yield
+
+    def _persist(self, records):
+        """Persist a list of mutation records using the configured storage backend"""
+        if self._batch_depth:
+            # Deferred until the outermost batch() block exits
+            for record in records:
+                key = record["todo"]["id"] if record["op"] == "put" else record["id"]
+                self._pending[key] = record
+            return
+        self.storage.apply(records, self._snapshot)
+
+    @contextmanager
+    def batch(self):
+        """Apply many changes in memory and persist them with a single save.
+
+        If an exception escapes the block, the todos it changed are put back
+        the way they were on entry and nothing is written (ids handed out in
+        the block are not reused). The manager and storage locks are held for
+        the whole block, so other threads wait for it.
+        """
+        with self._lock:
+            if self._batch_depth:
+                # Nested blocks join the outer batch
+                self._batch_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._batch_depth -= 1
+                return
+
+            with self._write_guard():
+                self._batch_depth = 1
+                try:
+                    yield self
+                except BaseException:
+                    self._batch_depth = 0
+                    self._pending = {}
+                    self._rollback()
+                    raise
+
+                self._batch_depth = 0
+                self._undo = {}
+                records = list(self._pending.values())
+                self._pending = {}
+                if records:
+                    self._persist(records)
+
+    def _remember(self, todo_id):
+        """Note a todo's state before a batch changes it, for rollback"""
+        if self._batch_depth and todo_id not in self._undo:
+            todo = self._todos.get(todo_id)
+            self._undo[todo_id] = todo.to_dict() if todo else None
+
+    def _rollback(self):
+        """Undo the changes of a failed batch, touching only the todos it changed"""
+        undo, self._undo = self._undo, {}
+        restored = []
+        for todo_id, item in undo.items():
+            if item is None:
+                self._todos.pop(todo_id, None)
+                self._index_remove(todo_id)
+                continue
+            todo = Todo.from_dict(item)
+            if todo_id not in self._todos:
+                restored.append(todo_id)
+            self._todos[todo_id] = todo
+            self._index_put(todo)
+        if restored and not self.storage.lazy:
+            # Deleted todos were re-added at the end; move them back among
+            # the others in id order (lazy stores keep them at the end rather
+            # than decoding every todo)
+            pending = sorted(restored)
+            restored = set(restored)
+            todos, self._todos = self._todos, self._new_store()
+            for todo_id in todos:
+                if todo_id in restored:
+                    continue
+                while pending and pending[0] < todo_id:
+                    earlier = pending.pop(0)
+                    self._todos[earlier] = todos[earlier]
+                self._todos[todo_id] = todos[todo_id]
+            for todo_id in pending:
+                self._todos[todo_id] = todos[todo_id]
+
+    def add_many(self, items):
+        """Add several todos at once; items are titles or (title, description) pairs"""
+        added = []
+        with self.batch():
+            for item in items:
+                if isinstance(item, str):
+                    added.append(self.add_todo(item))
+                else:
+                    added.append(self.add_todo(*item))
+        return added
+
+    def delete_many(self, todo_ids):
+        """Delete several todos at once and return how many were removed"""
+        with self.batch():
+            return sum(1 for todo_id in todo_ids if self.delete_todo(todo_id))
+
+    def set_completed_many(self, todo_ids, completed=True):
+        """Mark several todos complete (or incomplete) and return how many changed"""
+        changed = 0
+        with self.batch():
+            for todo_id in todo_ids:
+                todo = self._todos.get(todo_id)
+                if todo and todo.completed != completed:
+                    self._remember(todo_id)
+                    todo.completed = completed
+                    self._persist([{"op": "put", "todo": todo.to_dict()}])
+                    changed += 1
+        return changed
 
     def add_todo(self, title, description=""):
-        todo = Todo(title, description)
-        self.todos.append(todo)
-        self.save_to_file()  # Save after adding
-        return todo
+        with self._write_guard():
+            todo = Todo(self._ids.allocate(), title, description)
+            self._remember(todo.id)
+            self._todos[todo.id] = todo
+            self._index_put(todo)
+            self._persist([{"op": "put", "todo": todo.to_dict()}])  # Save after adding
+            return todo
 
     def get_all_todos(self):
-        return self.todos
+        with self._lock:
+            self.refresh()
+            return self.todos
+
+    def count(self, completed=None):
+        """Number of todos, or only completed (True) / pending (False) ones"""
+        with self._lock:
+            self.refresh()
+            if completed is None:
+                return len(self._todos)
+            return sum(1 for todo in self._todos.values() if todo.completed == completed)
+
+    def get_page(self, offset, limit, completed=None):
+        """Up to limit todos starting at offset, in insertion order.
+
+        With completed=True/False only completed or pending todos are paged.
+        Unfiltered pages skip ahead over ids only, so lazy and columnar stores
+        build just the todos on the page.
+        """
+        with self._lock:
+            self.refresh()
+            if completed is None:
+                return [self._todos.get(todo_id) for todo_id in islice(iter(self._todos), offset, offset + limit)]
+            todos = (todo for todo in self._todos.values() if todo.completed == completed)
+            return list(islice(todos, offset, offset + limit))
 
     def find_todo_by_id(self, todo_id):
-        for todo in self.todos:
-            if todo.id == todo_id:
-                return todo
-        return None
+        with self._lock:
+            self.refresh()
+            return self._todos.get(todo_id)
 
     def update_todo(self, todo_id, new_title=None, new_description=None):
-        todo = self.find_todo_by_id(todo_id)
-        if todo:
-            if new_title is not None:
-                todo.title = new_title
-            if new_description is not None:
-                todo.description = new_description
-            self.save_to_file()  # Save after updating
-            return True
-        return False
+        with self._write_guard():
+            todo = self._todos.get(todo_id)
+            if todo:
+                self._remember(todo_id)
+                if new_title is not None:
+                    todo.title = new_title
+                if new_description is not None:
+                    todo.description = new_description
+                self._index_put(todo)
+                self._persist([{"op": "put", "todo": todo.to_dict()}])  # Save after updating
+                return True
+            return False
 
     def delete_todo(self, todo_id):
-        todo = self.find_todo_by_id(todo_id)
-        if todo:
-            self.todos.remove(todo)
-            self.save_to_file()  # Save after deleting
-            return True
-        return False
+        with self._write_guard():
+            self._remember(todo_id)
+            todo = self._todos.pop(todo_id, None)
+            if todo:
+                self._index_remove(todo_id)
+                self._persist([{"op": "delete", "id": todo_id}])  # Save after deleting
+                return True
+            return False
 
     def toggle_complete(self, todo_id):
-        todo = self.find_todo_by_id(todo_id)
-        if todo:
-            todo.completed = not todo.completed
-            self.save_to_file()  # Save after toggling
-            return True
-        return False
\ No newline at end of file
+        with self._write_guard():
+            todo = self._todos.get(todo_id)
+            if todo:
+                self._remember(todo_id)
+                todo.completed = not todo.completed
+                self._persist([{"op": "put", "todo": todo.to_dict()}])  # Save after toggling
+                return True
+            return False
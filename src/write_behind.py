@@ -0,0 +1,156 @@
+import atexit
+import threading
+import time
+from storage import TodoStorage
+
+DURABILITY_POLICIES = ("always", "debounce", "exit")
+
+
+def _record_key(record):
+    return record["todo"]["id"] if record["op"] == "put" else record["id"]
+
+
+class WriteBehindStorage(TodoStorage):
+    """Wraps another storage backend and defers its writes.
+
+    Mutation records are coalesced per todo id in memory. With the
+    "debounce" policy a background thread writes them out at most once every
+    ``interval_ms``; with "exit" they are only written on flush()/close() or
+    when the interpreter exits. Either way the caller never waits for I/O.
+
+    Other processes cannot see the deferred changes (nor ids handed out for
+    them), so this storage takes the data file for itself: it raises
+    file_lock.StorageBusyError if another process has it open, and other
+    processes cannot open it until this one is closed.
+    """
+
+    def __init__(self, inner, policy="debounce", interval_ms=200):
+        if policy not in ("debounce", "exit"):
+            raise ValueError(f"Unsupported write-behind policy '{policy}'")
+        claim = getattr(inner, "claim", None)
+        if claim is not None:
+            try:
+                claim.make_exclusive()
+            except Exception:
+                inner.close()
+                raise
+        self.inner = inner
+        self.policy = policy
+        self.interval = interval_ms / 1000.0
+        self._lock = threading.Lock()
+        # Serializes flushes so the thread and an explicit flush() never
+        # write the same records concurrently
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        # Records taken by a flush that has not reached the disk yet
+        self._inflight = {}
+        # Every apply() bumps the sequence number; _written_seq is the newest
+        # one known to be on disk, so a flush overtaken by a full rewrite
+        # does not write its older snapshot over it
+        self._seq = 0
+        self._written_seq = 0
+        self._todos = None
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+        if policy == "debounce":
+            self._thread = threading.Thread(target=self._run, name="todo-flusher", daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait()
+            if self._closed:
+                break
+            # Let the burst of mutations that woke us finish, then write it
+            # out in one go
+            time.sleep(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    @property
+    def lazy(self):
+        return self.inner.lazy
+
+    def load(self):
+        return self.inner.load()
+
+    def lock(self):
+        return self.inner.lock()
+
+    def changed(self):
+        return self.inner.changed()
+
+    def reload_changes(self, current):
+        records = self.inner.reload_changes(current)
+        with self._lock:
+            # Our own unflushed edits are newer than what is on disk
+            return [record for record in records
+                    if _record_key(record) not in self._pending and _record_key(record) not in self._inflight]
+
+    def apply(self, records, todos):
+        with self._lock:
+            self._seq += 1
+            for record in records:
+                self._pending[_record_key(record)] = record
+            self._todos = todos
+        self._wakeup.set()
+
+    def flush(self):
+        """Write any pending records to the wrapped storage now.
+
+        Must not be called while holding the manager's lock or the storage
+        lock: it takes them itself, in that order, after the flush lock.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._inflight = self._pending
+                self._pending = {}
+                todos = self._todos
+                seq = self._seq
+            if not self._inflight:
+                return
+            try:
+                # Taken after the records, so it includes every change they describe
+                snapshot = todos()
+                with self.inner.lock():
+                    if self._written_seq < seq:
+                        self.inner.apply(list(self._inflight.values()), lambda: snapshot)
+                        self._written_seq = seq
+            except Exception as e:
+                print(f"Error flushing changes: {e}")
+            finally:
+                with self._lock:
+                    self._inflight = {}
+
+    def _take_pending(self):
+        with self._lock:
+            records = list(self._pending.values())
+            self._pending = {}
+            return records, self._seq
+
+    def save_all(self, todos):
+        with self.inner.lock():
+            saved = self.inner.save_all(todos)
+            if saved:
+                # A full rewrite supersedes any records still waiting to be written
+                _, self._written_seq = self._take_pending()
+            return saved
+
+    def compact(self, todos):
+        with self.inner.lock():
+            records, seq = self._take_pending()
+            if records:
+                self.inner.apply(records, todos)
+            self.inner.compact(todos)
+            self._written_seq = seq
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        atexit.unregister(self.flush)
+        self.inner.close()